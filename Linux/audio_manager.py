@@ -4,7 +4,8 @@ Handles enumeration and control of audio input/output devices via PipeWire/Pulse
 """
 
 import threading
-from typing import List, Optional, Callable, Dict, Any
+from gi.repository import GLib
+from typing import List, Optional, Callable, Dict, Any, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
@@ -16,14 +17,33 @@ except ImportError:
     print("Warning: pulsectl not available, device enumeration disabled")
 
 
+# Port names come from a small fixed vocabulary ("analog-output-speaker",
+# "analog-input-headset-mic", ...); share one string object per name
+_port_names: Dict[str, str] = {}
+_port_names_lower: Dict[str, str] = {}
+
+
+def _intern_port(name: str) -> str:
+    """Return the shared instance of a port name"""
+    return _port_names.setdefault(name, name)
+
+
+def _lower_port(name: str) -> str:
+    """Return the lowercased port name, computed once per name"""
+    lower = _port_names_lower.get(name)
+    if lower is None:
+        lower = _port_names_lower.setdefault(name, name.lower())
+    return lower
+
+
 class DeviceType(Enum):
     INPUT = "input"
     OUTPUT = "output"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True, eq=False)
 class AudioDevice:
-    """Represents an audio device"""
+    """Represents an audio device (immutable; build a new one to change it)"""
     name: str
     description: str
     device_type: DeviceType
@@ -31,9 +51,27 @@ class AudioDevice:
     is_default: bool = False
     volume: float = 1.0
     muted: bool = False
-    ports: List[str] = field(default_factory=list)
+    ports: Tuple[str, ...] = ()
     active_port: Optional[str] = None
+    channels: int = 2
+    # Lowercased active_port, computed once for port-name matching
+    active_port_lower: str = field(init=False, repr=False, compare=False)
     
+    def __post_init__(self):
+        object.__setattr__(
+            self, 'active_port_lower',
+            _lower_port(self.active_port) if self.active_port else ''
+        )
+        
+    def __eq__(self, other):
+        # Identity is the PulseAudio index within a device type
+        if not isinstance(other, AudioDevice):
+            return NotImplemented
+        return self.index == other.index and self.device_type == other.device_type
+        
+    def __hash__(self):
+        return hash((self.index, self.device_type))
+        
     @property
     def display_name(self) -> str:
         """Get a user-friendly display name"""
@@ -48,13 +86,28 @@ class AudioManager:
     # Virtual device representing the Android microphone (network input)
     ANDROID_MIC_NAME = "android_network"
     
+    # Delay before a scheduled refresh runs (seconds)
+    REFRESH_DEBOUNCE = 0.25
+    
+    # Minimum spacing between volume updates sent to PulseAudio (seconds)
+    VOLUME_DEBOUNCE = 0.015
+    
     def __init__(self):
         self._pulse: Optional[pulsectl.Pulse] = None
-        self._lock = threading.Lock()
+        # Re-entrant: callbacks fired from locked sections may call back in
+        self._lock = threading.RLock()
+        
+        # Cached devices, keyed by PulseAudio index (written under _lock)
+        self._input_devices: Dict[int, AudioDevice] = {}
+        self._output_devices: Dict[int, AudioDevice] = {}
         
-        # Cached devices
-        self._input_devices: List[AudioDevice] = []
-        self._output_devices: List[AudioDevice] = []
+        # Immutable views of the caches, republished after every write so
+        # getters can read them without taking the lock
+        self._input_snapshot: Tuple[AudioDevice, ...] = ()
+        self._output_snapshot: Tuple[AudioDevice, ...] = ()
+        
+        self._default_source: Optional[str] = None
+        self._default_sink: Optional[str] = None
         
         # Current selections
         self._current_input: Optional[AudioDevice] = None
@@ -63,24 +116,62 @@ class AudioManager:
         # Callbacks
         self._on_devices_changed: Optional[Callable[[], None]] = None
         self._on_device_error: Optional[Callable[[str], None]] = None
+        # An error raised before set_callbacks ran, reported once it does
+        self._undelivered_error: Optional[str] = None
+        self._error_lock = threading.Lock()
         
         # Headphone detection
         self._headphone_warning: bool = False
         
+        # Debounced refresh (coalesces bursts of device change events)
+        self._pending_refresh: Optional[threading.Timer] = None
+        
+        # Throttled volume updates
+        self._volume_timer: Optional[threading.Timer] = None
+        self._pending_volume: float = 1.0
+        
+        # PulseAudio event subscription
+        self._event_pulse: Optional[pulsectl.Pulse] = None
+        self._event_thread: Optional[threading.Thread] = None
+        self._events_running = False
+        self._pending_events: List[tuple] = []
+        
         self._initialize()
         
     def _initialize(self):
         """Initialize connection to PulseAudio"""
+        # Placeholder devices until the real list arrives
+        self._create_mock_devices()
+        
         if not PULSE_AVAILABLE:
             return
             
+        # Connecting can take hundreds of ms; keep it off the UI thread
+        threading.Thread(
+            target=self._connect_worker,
+            daemon=True,
+            name="PulseConnect"
+        ).start()
+        
+    def _connect_worker(self):
+        """Connect to PulseAudio and load the initial device list"""
         try:
-            self._pulse = pulsectl.Pulse('pulselink-manager')
-            self.refresh_devices()
+            pulse = pulsectl.Pulse('pulselink-manager')
         except Exception as e:
-            if self._on_device_error:
-                self._on_device_error(f"Failed to connect to PulseAudio: {e}")
-                
+            self._report_error(f"Failed to connect to PulseAudio: {e}")
+            return
+            
+        with self._lock:
+            self._pulse = pulse
+            # Drop placeholder selections so real defaults get picked
+            if not self.is_android_input_selected():
+                self._current_input = None
+            self._current_output = None
+            
+        self.refresh_devices()
+        self._start_event_listener()
+        
+
     def set_callbacks(
         self,
         on_devices_changed: Optional[Callable[[], None]] = None,
@@ -88,37 +179,46 @@ class AudioManager:
     ):
         """Set callback functions"""
         self._on_devices_changed = on_devices_changed
-        self._on_device_error = on_device_error
+        with self._error_lock:
+            self._on_device_error = on_device_error
+            error, self._undelivered_error = self._undelivered_error, None
+        if error and on_device_error:
+            GLib.idle_add(self._emit_device_error, error)
         
+    def schedule_refresh(self):
+        """Refresh devices once change events stop arriving"""
+        with self._lock:
+            if self._pending_refresh and self._pending_refresh.is_alive():
+                self._pending_refresh.cancel()
+            self._pending_refresh = threading.Timer(
+                self.REFRESH_DEBOUNCE, self.refresh_devices
+            )
+            self._pending_refresh.daemon = True
+            self._pending_refresh.start()
+            
     def refresh_devices(self):
         """Refresh the list of available devices"""
         if not self._pulse:
             self._create_mock_devices()
             return
             
+        error = None
         with self._lock:
             try:
-                # Get sources (inputs)
-                self._input_devices = []
-                default_source = self._pulse.server_info().default_source_name
+                self._ensure_connected()
                 
-                for source in self._pulse.source_list():
-                    # Skip monitor sources
-                    if '.monitor' in source.name:
-                        continue
-                        
-                    device = AudioDevice(
-                        name=source.name,
-                        description=source.description,
-                        device_type=DeviceType.INPUT,
-                        index=source.index,
-                        is_default=(source.name == default_source),
-                        volume=source.volume.value_flat if source.volume else 1.0,
-                        muted=bool(source.mute),
-                        ports=[p.name for p in (source.port_list or [])],
-                        active_port=source.port_active.name if source.port_active else None
-                    )
-                    self._input_devices.append(device)
+                # One server_info round-trip covers both defaults
+                server_info = self._pulse.server_info()
+                self._default_source = server_info.default_source_name
+                self._default_sink = server_info.default_sink_name
+                
+                # Get sources (inputs), skipping monitor sources
+                make_input = self._make_input_device
+                self._input_devices = {
+                    s.index: make_input(s)
+                    for s in self._pulse.source_list()
+                    if '.monitor' not in s.name
+                }
                     
                 # Add virtual Android device
                 android_device = AudioDevice(
@@ -128,48 +228,180 @@ class AudioManager:
                     index=-1,
                     is_default=False
                 )
-                self._input_devices.append(android_device)
+                self._input_devices[android_device.index] = android_device
                     
                 # Get sinks (outputs)
-                self._output_devices = []
-                default_sink = self._pulse.server_info().default_sink_name
-                
-                for sink in self._pulse.sink_list():
-                    device = AudioDevice(
-                        name=sink.name,
-                        description=sink.description,
-                        device_type=DeviceType.OUTPUT,
-                        index=sink.index,
-                        is_default=(sink.name == default_sink),
-                        volume=sink.volume.value_flat if sink.volume else 1.0,
-                        muted=bool(sink.mute),
-                        ports=[p.name for p in (sink.port_list or [])],
-                        active_port=sink.port_active.name if sink.port_active else None
-                    )
-                    self._output_devices.append(device)
+                make_output = self._make_output_device
+                self._output_devices = {
+                    s.index: make_output(s) for s in self._pulse.sink_list()
+                }
                     
+                self._publish_snapshots()
+                
                 # Check for headphone routing conflicts
                 self._check_headphone_conflict()
                 
                 # Set defaults if not set
-                if self._current_input is None and self._input_devices:
-                    default = next((d for d in self._input_devices if d.is_default), None)
-                    self._current_input = default or self._input_devices[0]
+                inputs = self._input_snapshot
+                if self._current_input is None and inputs:
+                    default = next((d for d in inputs if d.is_default), None)
+                    self._current_input = default or inputs[0]
                     
-                if self._current_output is None and self._output_devices:
-                    default = next((d for d in self._output_devices if d.is_default), None)
-                    self._current_output = default or self._output_devices[0]
+                outputs = self._output_snapshot
+                if self._current_output is None and outputs:
+                    default = next((d for d in outputs if d.is_default), None)
+                    self._current_output = default or outputs[0]
                     
             except Exception as e:
-                if self._on_device_error:
-                    self._on_device_error(f"Failed to enumerate devices: {e}")
-                    
-        if self._on_devices_changed:
-            self._on_devices_changed()
+                error = f"Failed to enumerate devices: {e}"
+                
+        if error:
+            self._report_error(error)
+            
+        self._notify_devices_changed()
             
+    def _make_input_device(self, source) -> AudioDevice:
+        """Build an AudioDevice from a pulsectl source"""
+        port_active = source.port_active
+        return AudioDevice(
+            name=source.name,
+            description=source.description,
+            device_type=DeviceType.INPUT,
+            index=source.index,
+            is_default=(source.name == self._default_source),
+            volume=source.volume.value_flat if source.volume else 1.0,
+            muted=bool(source.mute),
+            channels=source.channel_count,
+            ports=tuple(_intern_port(p.name) for p in (source.port_list or ())),
+            active_port=_intern_port(port_active.name) if port_active else None
+        )
+        
+    def _make_output_device(self, sink) -> AudioDevice:
+        """Build an AudioDevice from a pulsectl sink"""
+        port_active = sink.port_active
+        return AudioDevice(
+            name=sink.name,
+            description=sink.description,
+            device_type=DeviceType.OUTPUT,
+            index=sink.index,
+            is_default=(sink.name == self._default_sink),
+            volume=sink.volume.value_flat if sink.volume else 1.0,
+            muted=bool(sink.mute),
+            channels=sink.channel_count,
+            ports=tuple(_intern_port(p.name) for p in (sink.port_list or ())),
+            active_port=_intern_port(port_active.name) if port_active else None
+        )
+        
+    def _publish_snapshots(self):
+        """Publish fresh device tuples for lock-free readers (call under _lock)"""
+        self._input_snapshot = tuple(self._input_devices.values())
+        self._output_snapshot = tuple(self._output_devices.values())
+        
+    def _start_event_listener(self):
+        """Subscribe to PulseAudio device events on a dedicated connection"""
+        try:
+            # Event listening blocks its client, so it gets its own connection
+            self._event_pulse = pulsectl.Pulse('pulselink-events')
+            self._event_pulse.event_mask_set('source', 'sink', 'server')
+            self._event_pulse.event_callback_set(self._on_pulse_event)
+        except Exception as e:
+            self._event_pulse = None
+            self._report_error(f"Failed to subscribe to device events: {e}")
+            return
+            
+        self._events_running = True
+        self._event_thread = threading.Thread(
+            target=self._event_loop,
+            daemon=True,
+            name="PulseEvents"
+        )
+        self._event_thread.start()
+        
+    def _on_pulse_event(self, ev):
+        """Queue a PulseAudio event (runs inside event_listen)"""
+        self._pending_events.append((ev.facility, ev.t, ev.index))
+        raise pulsectl.PulseLoopStop
+        
+    def _event_loop(self):
+        """Wait for device events and apply them as delta updates"""
+        while self._events_running:
+            try:
+                self._event_pulse.event_listen(timeout=0.5)
+            except Exception:
+                break
+                
+            events, self._pending_events = self._pending_events, []
+            if events:
+                self._apply_events(events)
+                
+    def _apply_events(self, events):
+        """Update only the devices named by the given events"""
+        changed = False
+        
+        for facility, event_type, index in events:
+            if facility == 'server':
+                # Default device changed - re-resolve everything once settled
+                self.schedule_refresh()
+                continue
+                
+            with self._lock:
+                # cleanup() may have closed the client since the event arrived
+                if not self._pulse:
+                    return
+                    
+                if facility == 'source':
+                    devices = self._input_devices
+                    lookup = self._pulse.source_info
+                    build = self._make_input_device
+                    current_attr = '_current_input'
+                else:
+                    devices = self._output_devices
+                    lookup = self._pulse.sink_info
+                    build = self._make_output_device
+                    current_attr = '_current_output'
+                current = getattr(self, current_attr)
+                is_current = current is not None and current.index == index
+                    
+                if event_type == 'remove':
+                    changed |= devices.pop(index, None) is not None
+                    if is_current:
+                        setattr(self, current_attr, None)
+                    continue
+                    
+                try:
+                    info = lookup(index)
+                except Exception:
+                    continue
+                    
+                if facility == 'source' and '.monitor' in info.name:
+                    continue
+                    
+                device = build(info)
+                old = devices.get(index)
+                devices[index] = device
+                
+                # Keep the selection pointing at the live record, not a stale copy
+                if is_current:
+                    setattr(self, current_attr, device)
+                
+                # Volume/mute changes arrive constantly; only structural
+                # changes are worth telling the UI about
+                if (old is None or
+                        (old.description, old.ports, old.active_port) !=
+                        (device.description, device.ports, device.active_port)):
+                    changed = True
+                    
+        with self._lock:
+            self._publish_snapshots()
+            if changed:
+                self._check_headphone_conflict()
+                
+        if changed:
+            self._notify_devices_changed()
+                
     def _create_mock_devices(self):
         """Create mock devices when PulseAudio is not available"""
-        self._input_devices = [
+        inputs = [
             AudioDevice(
                 name="default_input",
                 description="Built-in Microphone",
@@ -186,7 +418,7 @@ class AudioManager:
             )
         ]
         
-        self._output_devices = [
+        outputs = [
             AudioDevice(
                 name="default_output",
                 description="Built-in Speakers",
@@ -196,32 +428,56 @@ class AudioManager:
             )
         ]
         
-        self._current_input = self._input_devices[0]
-        self._current_output = self._output_devices[0]
+        with self._lock:
+            self._input_devices = {d.index: d for d in inputs}
+            self._output_devices = {d.index: d for d in outputs}
+            self._publish_snapshots()
+        
+        self._current_input = inputs[0]
+        self._current_output = outputs[0]
         
+        self._notify_devices_changed()
+            
+    def _notify_devices_changed(self):
+        """Run the devices-changed callback on the main loop (callable from any thread)"""
         if self._on_devices_changed:
-            self._on_devices_changed()
+            GLib.idle_add(self._emit_devices_changed)
             
+    def _emit_devices_changed(self) -> bool:
+        """Invoke the devices-changed callback (main thread)"""
+        if self._on_devices_changed:
+            self._on_devices_changed()
+        return False
+        
+    def _report_error(self, message: str):
+        """Run the device-error callback on the main loop (callable from any thread)"""
+        with self._error_lock:
+            if not self._on_device_error:
+                # Nobody is listening yet; set_callbacks delivers it
+                self._undelivered_error = message
+                return
+        GLib.idle_add(self._emit_device_error, message)
+        
+    def _emit_device_error(self, message: str) -> bool:
+        """Invoke the device-error callback (main thread)"""
+        if self._on_device_error:
+            self._on_device_error(message)
+        return False
+        
     def _check_headphone_conflict(self):
         """
         Check if headphones with mic are connected - this can cause routing issues
         where audio output goes to headphones instead of speakers
         """
-        self._headphone_warning = False
-        
-        # Look for devices that have both headphone and headset ports
-        for output in self._output_devices:
-            if output.active_port:
-                port_lower = output.active_port.lower()
-                if 'headphone' in port_lower or 'headset' in port_lower:
-                    # Check if there's also an input with headset port
-                    for input_dev in self._input_devices:
-                        if input_dev.active_port:
-                            input_port = input_dev.active_port.lower()
-                            if 'headset' in input_port:
-                                self._headphone_warning = True
-                                return
-                                
+        # Output on headphones/headset plus an input on a headset port
+        out_hit = any(
+            'headphone' in d.active_port_lower or 'headset' in d.active_port_lower
+            for d in self._output_snapshot
+        )
+        self._headphone_warning = out_hit and any(
+            'headset' in d.active_port_lower for d in self._input_snapshot
+        )
+        
     @property
     def has_headphone_conflict(self) -> bool:
         """Returns True if there's a potential headphone routing conflict"""
@@ -229,11 +485,11 @@ class AudioManager:
         
     def get_input_devices(self) -> List[AudioDevice]:
         """Get list of input devices"""
-        return self._input_devices.copy()
+        return list(self._input_snapshot)
         
     def get_output_devices(self) -> List[AudioDevice]:
         """Get list of output devices"""
-        return self._output_devices.copy()
+        return list(self._output_snapshot)
         
     def get_current_input(self) -> Optional[AudioDevice]:
         """Get currently selected input device"""
@@ -245,6 +501,10 @@ class AudioManager:
         
     def set_input_device(self, device: AudioDevice) -> bool:
         """Set the active input device"""
+        current = self._current_input
+        if current is not None and current.index == device.index and current.name == device.name:
+            return True
+            
         if device.name == self.ANDROID_MIC_NAME:
             # Virtual device - just track selection
             self._current_input = device
@@ -256,49 +516,99 @@ class AudioManager:
             
         try:
             with self._lock:
+                self._ensure_connected()
                 self._pulse.source_default_set(device.name)
                 self._current_input = device
                 return True
         except Exception as e:
-            if self._on_device_error:
-                self._on_device_error(f"Failed to set input device: {e}")
+            self._report_error(f"Failed to set input device: {e}")
             return False
             
-    def set_output_device(self, device: AudioDevice) -> bool:
-        """Set the active output device"""
+    def set_output_device(self, device: AudioDevice, move_streams: bool = True) -> bool:
+        """
+        Set the active output device
+        
+        Playing streams are moved to the new sink unless move_streams is False,
+        in which case only the default changes and apps pick it up on their
+        next stream.
+        """
+        current = self._current_output
+        if current is not None and current.index == device.index and current.name == device.name:
+            return True
+            
         if not self._pulse:
             self._current_output = device
             return True
             
         try:
             with self._lock:
+                self._ensure_connected()
                 self._pulse.sink_default_set(device.name)
                 self._current_output = device
                 
-                # Move all current streams to new sink
-                for stream in self._pulse.sink_input_list():
-                    self._pulse.sink_input_move(stream.index, device.index)
-                    
+                if move_streams:
+                    # Paused streams and streams already on the sink stay put
+                    streams = [
+                        s for s in self._pulse.sink_input_list()
+                        if s.sink != device.index and not s.corked
+                    ]
+                    for stream in streams:
+                        self._pulse.sink_input_move(stream.index, device.index)
+                        
                 return True
         except Exception as e:
-            if self._on_device_error:
-                self._on_device_error(f"Failed to set output device: {e}")
+            self._report_error(f"Failed to set output device: {e}")
             return False
             
+    def _ensure_connected(self):
+        """Reconnect the shared client if PulseAudio dropped it (call under _lock)"""
+        if not self._pulse.connected:
+            self._pulse.connect()
+            
     def set_output_volume(self, volume: float):
         """Set output volume (0.0 to 1.0)"""
         if not self._pulse or not self._current_output:
             return
             
+        # Sliders fire continuously; apply at most one update per interval
+        with self._lock:
+            self._pending_volume = volume
+            # A scheduled update will pick up the new value
+            if self._volume_timer is None:
+                self._schedule_volume_apply()
+                
+    def _schedule_volume_apply(self):
+        """Start the timer that applies the pending volume (call under _lock)"""
+        self._volume_timer = threading.Timer(
+            self.VOLUME_DEBOUNCE, self._apply_output_volume
+        )
+        self._volume_timer.daemon = True
+        self._volume_timer.start()
+            
+    def _apply_output_volume(self):
+        """Push the latest requested volume to the current output"""
         try:
             with self._lock:
-                self._pulse.volume_set_all_chans(
-                    self._pulse.sink_list()[self._current_output.index],
-                    volume
+                # From here on, new requests schedule their own update
+                self._volume_timer = None
+                volume = self._pending_volume
+                output = self._current_output
+                if not self._pulse or not output:
+                    return
+                self._ensure_connected()
+                # Channel count comes from the cache, so no sink lookup is needed
+                self._pulse.sink_volume_set(
+                    output.index,
+                    pulsectl.PulseVolumeInfo(volume, output.channels)
                 )
         except Exception as e:
-            if self._on_device_error:
-                self._on_device_error(f"Failed to set volume: {e}")
+            self._report_error(f"Failed to set volume: {e}")
+                
+        # Trailing edge: a value requested while applying must not be lost
+        with self._lock:
+            if (self._pulse and self._pending_volume != volume and
+                    self._volume_timer is None):
+                self._schedule_volume_apply()
                 
     def is_android_input_selected(self) -> bool:
         """Check if Android network input is selected"""
@@ -307,7 +617,24 @@ class AudioManager:
                 
     def cleanup(self):
         """Clean up resources"""
+        self._events_running = False
+        if self._event_thread and self._event_thread.is_alive():
+            self._event_thread.join(timeout=1.0)
+        self._event_thread = None
+        if self._event_pulse:
+            try:
+                self._event_pulse.close()
+            except:
+                pass
+            self._event_pulse = None
+            
         with self._lock:
+            if self._pending_refresh:
+                self._pending_refresh.cancel()
+                self._pending_refresh = None
+            if self._volume_timer:
+                self._volume_timer.cancel()
+                self._volume_timer = None
             if self._pulse:
                 try:
                     self._pulse.close()
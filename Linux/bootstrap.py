@@ -9,6 +9,7 @@ import os
 import sys
 import subprocess
 import json
+from collections import deque
 from pathlib import Path
 
 # Configuration
@@ -16,17 +17,26 @@ APP_NAME = "pulselink"
 CONFIG_DIR = Path.home() / ".config" / APP_NAME
 VENV_DIR = CONFIG_DIR / "venv"
 CONFIG_FILE = CONFIG_DIR / "config.json"
+# Written after a successful install; newer than this script means ready
+READY_FILE = CONFIG_DIR / ".ready"
+# Kept outside the venv so reinstalls reuse downloaded wheels
+PIP_CACHE_DIR = CONFIG_DIR / "pip-cache"
+# Output of the last venv/pip run, streamed rather than held in memory
+INSTALL_LOG = CONFIG_DIR / "install.log"
 
 REQUIRED_PACKAGES = [
     "pulsectl",
     "sounddevice", 
     "numpy",
     "scipy",
+    "numba",
     "qrcode",
-    "Pillow",
     "netifaces",
 ]
 
+# Packages that must never be built from source (slow to compile)
+BINARY_ONLY_PACKAGES = ["numpy", "scipy", "numba", "llvmlite"]
+
 # Get the app directory (where this script is located)
 if getattr(sys, 'frozen', False):
     APP_DIR = Path(sys.executable).parent
@@ -34,8 +44,45 @@ else:
     APP_DIR = Path(__file__).parent.resolve()
 
 
+def typelibs_present():
+    """Check that the Gtk 4 and Adw 1 GI typelibs are installed."""
+    import glob
+    
+    dirs = [d for d in os.environ.get("GI_TYPELIB_PATH", "").split(os.pathsep) if d]
+    for pattern in ("/usr/lib*/girepository-1.0",
+                    "/usr/lib/*/girepository-1.0",
+                    "/usr/local/lib*/girepository-1.0",
+                    "/usr/local/lib/*/girepository-1.0"):
+        dirs.extend(glob.glob(pattern))
+    
+    return all(
+        any(os.path.exists(os.path.join(d, typelib)) for d in dirs)
+        for typelib in ("Gtk-4.0.typelib", "Adw-1.typelib")
+    )
+
+
 def check_system_gtk():
     """Check if system GTK4 and libadwaita are available."""
+    import importlib.util
+    
+    if importlib.util.find_spec("gi") is None:
+        return False
+    
+    # Cheap probe first; loading the GI typelibs takes far longer. pkg-config
+    # only proves the -dev files are there, so the typelibs are looked up too
+    try:
+        probe = subprocess.run(
+            ["pkg-config", "--exists", "gtk4", "libadwaita-1"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        if probe.returncode == 0 and typelibs_present():
+            return True
+    except OSError:
+        pass
+    
+    # No pkg-config data (e.g. runtime-only install) - do the full check
     try:
         import gi
         gi.require_version('Gtk', '4.0')
@@ -48,7 +95,17 @@ def check_system_gtk():
 
 def check_deps_in_venv():
     """Check if all deps are installed in our venv."""
-    # First check if config file exists with installed flag
+    # Fast path: a single stat of the ready marker, as long as the venv
+    # interpreter it vouches for is still there
+    try:
+        if os.stat(READY_FILE).st_mtime >= os.stat(__file__).st_mtime:
+            if (VENV_DIR / "bin" / "python3").exists():
+                return True
+            READY_FILE.unlink()
+    except OSError:
+        pass
+    
+    # Otherwise check if config file exists with installed flag
     if CONFIG_FILE.exists():
         try:
             with open(CONFIG_FILE, "r") as f:
@@ -78,6 +135,59 @@ def check_deps_in_venv():
     return True
 
 
+def run_logged(args, log, on_line=None):
+    """
+    Run a command, streaming its output line by line into the open log file.
+    Returns (returncode, last few lines of output) for error reporting.
+    """
+    env = os.environ.copy()
+    env["PIP_DISABLE_PIP_VERSION_CHECK"] = "1"
+    env["PYTHONUNBUFFERED"] = "1"
+    
+    proc = subprocess.Popen(
+        [str(a) for a in args],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+        env=env
+    )
+    
+    tail = deque(maxlen=20)
+    for line in proc.stdout:
+        log.write(line)
+        tail.append(line)
+        if on_line:
+            on_line(line)
+    
+    return proc.wait(), "".join(tail)
+
+
+def install_packages(pip_path, log, on_status=None):
+    """
+    Install REQUIRED_PACKAGES with a single pip invocation.
+    Reports "Installing <pkg>..." through on_status as pip collects each one.
+    Returns (success, output tail).
+    """
+    def on_line(line):
+        if on_status and line.startswith("Collecting "):
+            on_status(f"Installing {line.split()[1]}...")
+    
+    returncode, tail = run_logged(
+        [
+            pip_path, "install", "--no-input",
+            "--prefer-binary",
+            f"--only-binary={','.join(BINARY_ONLY_PACKAGES)}",
+            f"--cache-dir={PIP_CACHE_DIR}",
+            *REQUIRED_PACKAGES
+        ],
+        log,
+        on_line
+    )
+    return returncode == 0, tail
+
+
 def show_gtk_dialog(title, message, show_cancel=True):
     """Show a GTK dialog and return True if OK was clicked."""
     try:
@@ -152,8 +262,12 @@ def show_gtk_dialog(title, message, show_cancel=True):
             return True
 
 
-def create_venv_and_install():
-    """Create a virtual environment and install dependencies with GTK progress dialog."""
+def create_venv_and_install(title=None, message=None):
+    """
+    Create a virtual environment and install dependencies with GTK progress dialog.
+    If title/message are given, first ask for confirmation in the same GTK
+    application. Returns True on success, False on failure, None if cancelled.
+    """
     import subprocess
     import threading
     
@@ -166,7 +280,7 @@ def create_venv_and_install():
         result = [False]
         error_msg = [None]
         
-        class ProgressApp(Adw.Application):
+        class SetupApp(Adw.Application):
             def __init__(self):
                 super().__init__(
                     application_id="dev.uzair.pulselink.installer",
@@ -177,6 +291,43 @@ def create_venv_and_install():
                 self.spinner = None
             
             def do_activate(self):
+                if title is None:
+                    self.show_progress()
+                    return
+                
+                # Create a hidden window as parent
+                ask_win = Adw.ApplicationWindow(application=self)
+                ask_win.set_default_size(1, 1)
+                ask_win.set_decorated(False)
+                
+                dialog = Adw.MessageDialog(
+                    transient_for=ask_win,
+                    heading=title,
+                    body=message,
+                )
+                dialog.add_response("cancel", "Cancel")
+                dialog.add_response("install", "Install")
+                dialog.set_response_appearance("install", Adw.ResponseAppearance.SUGGESTED)
+                dialog.set_default_response("install")
+                dialog.set_close_response("cancel")
+                
+                def on_response(dialog, response):
+                    if response == "install":
+                        # Stay in this application; open the progress window
+                        # before closing the parent so the app keeps running
+                        self.show_progress()
+                        ask_win.close()
+                    else:
+                        result[0] = None
+                        ask_win.close()
+                        self.quit()
+                
+                dialog.connect("response", on_response)
+                
+                ask_win.present()
+                dialog.present()
+            
+            def show_progress(self):
                 # Create progress window
                 self.win = Adw.ApplicationWindow(application=self)
                 self.win.set_title("Installing Dependencies")
@@ -191,9 +342,9 @@ def create_venv_and_install():
                 main_box.set_margin_end(30)
                 
                 # Title
-                title = Gtk.Label(label="Installing PulseLink Dependencies")
-                title.add_css_class("title-2")
-                main_box.append(title)
+                title_label = Gtk.Label(label="Installing PulseLink Dependencies")
+                title_label.add_css_class("title-2")
+                main_box.append(title_label)
                 
                 # Spinner
                 self.spinner = Gtk.Spinner()
@@ -228,41 +379,35 @@ def create_venv_and_install():
                     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
                     
                     # Remove old venv if exists
+                    READY_FILE.unlink(missing_ok=True)
                     if VENV_DIR.exists():
                         import shutil
                         self.update_status("Removing old environment...")
                         shutil.rmtree(VENV_DIR)
                     
-                    # Create venv
-                    self.update_status("Creating virtual environment...")
-                    proc = subprocess.run(
-                        [sys.executable, "-m", "venv", str(VENV_DIR), "--system-site-packages"],
-                        capture_output=True,
-                        text=True
-                    )
-                    
-                    if proc.returncode != 0:
-                        error_msg[0] = f"Failed to create venv: {proc.stderr}"
-                        GLib.idle_add(self.finish_with_error)
-                        return
-                    
-                    pip_path = VENV_DIR / "bin" / "pip"
-                    
-                    # Upgrade pip
-                    self.update_status("Upgrading pip...")
-                    subprocess.run([str(pip_path), "install", "--upgrade", "pip"], 
-                                   capture_output=True)
-                    
-                    # Install packages one by one for better progress
-                    for i, pkg in enumerate(REQUIRED_PACKAGES):
-                        self.update_status(f"Installing {pkg}... ({i+1}/{len(REQUIRED_PACKAGES)})")
-                        proc = subprocess.run(
-                            [str(pip_path), "install", pkg],
-                            capture_output=True,
-                            text=True
+                    with open(INSTALL_LOG, "w") as log:
+                        # Create venv
+                        self.update_status("Creating virtual environment...")
+                        returncode, output = run_logged(
+                            [sys.executable, "-m", "venv", VENV_DIR, "--system-site-packages"],
+                            log
                         )
-                        if proc.returncode != 0:
-                            error_msg[0] = f"Failed to install {pkg}: {proc.stderr}"
+                        
+                        if returncode != 0:
+                            error_msg[0] = f"Failed to create venv: {output}"
+                            GLib.idle_add(self.finish_with_error)
+                            return
+                        
+                        pip_path = VENV_DIR / "bin" / "pip"
+                        
+                        # Upgrade pip
+                        self.update_status("Upgrading pip...")
+                        run_logged([pip_path, "install", "--upgrade", "pip"], log)
+                        
+                        # Install everything in one pip run (single resolver pass)
+                        ok, output = install_packages(pip_path, log, self.update_status)
+                        if not ok:
+                            error_msg[0] = f"Failed to install packages: {output}"
                             GLib.idle_add(self.finish_with_error)
                             return
                     
@@ -275,6 +420,7 @@ def create_venv_and_install():
                     }
                     with open(CONFIG_FILE, "w") as f:
                         json.dump(config, f, indent=2)
+                    READY_FILE.touch()
                     
                     result[0] = True
                     GLib.idle_add(self.finish_success)
@@ -293,14 +439,20 @@ def create_venv_and_install():
                 self.spinner.stop()
                 GLib.timeout_add(3000, self.quit)
         
-        app = ProgressApp()
+        app = SetupApp()
         app.run([])
         
         return result[0]
         
     except Exception as e:
         print(f"Progress dialog error: {e}")
-        # Fallback to terminal-based installation
+        # Fallback to terminal prompt and installation
+        if title is not None:
+            print(f"\n{title}")
+            print(f"{message}")
+            response = input("\nProceed with installation? [y/N]: ").strip().lower()
+            if response not in ('y', 'yes'):
+                return None
         return create_venv_and_install_terminal()
 
 
@@ -315,36 +467,37 @@ def create_venv_and_install_terminal():
     print("This may take a few minutes...")
     print("="*50 + "\n")
     
+    READY_FILE.unlink(missing_ok=True)
     if VENV_DIR.exists():
         import shutil
         shutil.rmtree(VENV_DIR)
     
-    print("Creating virtual environment...")
-    result = subprocess.run(
-        [sys.executable, "-m", "venv", str(VENV_DIR), "--system-site-packages"],
-        capture_output=True,
-        text=True
-    )
-    
-    if result.returncode != 0:
-        print(f"Error: {result.stderr}")
-        return False
-    
-    pip_path = VENV_DIR / "bin" / "pip"
-    
-    print("Upgrading pip...")
-    subprocess.run([str(pip_path), "install", "--upgrade", "pip"], capture_output=True)
-    
-    for pkg in REQUIRED_PACKAGES:
-        print(f"Installing {pkg}...")
-        result = subprocess.run([str(pip_path), "install", pkg], capture_output=True, text=True)
-        if result.returncode != 0:
-            print(f"Error installing {pkg}: {result.stderr}")
+    with open(INSTALL_LOG, "w") as log:
+        print("Creating virtual environment...")
+        returncode, output = run_logged(
+            [sys.executable, "-m", "venv", VENV_DIR, "--system-site-packages"],
+            log
+        )
+        
+        if returncode != 0:
+            print(f"Error: {output}")
+            return False
+        
+        pip_path = VENV_DIR / "bin" / "pip"
+        
+        print("Upgrading pip...")
+        run_logged([pip_path, "install", "--upgrade", "pip"], log)
+        
+        ok, output = install_packages(pip_path, log, print)
+        if not ok:
+            print(f"Error installing packages: {output}")
+            print(f"Full log: {INSTALL_LOG}")
             return False
     
     config = {"venv_path": str(VENV_DIR), "version": "1.0.0", "installed": True}
     with open(CONFIG_FILE, "w") as f:
         json.dump(config, f, indent=2)
+    READY_FILE.touch()
     
     print("\nInstallation complete!")
     return True
@@ -365,18 +518,24 @@ def run_with_venv():
 
 def run_directly():
     """Run directly with current Python (all deps available)."""
-    main_script = APP_DIR / "main.py"
+    import runpy
     
     # Add app directory to PYTHONPATH
     sys.path.insert(0, str(APP_DIR))
     
-    # Import and run
-    exec(open(main_script).read())
+    # Run main.py as __main__ through the import system so its
+    # bytecode is cached in __pycache__ between launches
+    runpy.run_module("main", run_name="__main__", alter_sys=True)
 
 
 def main():
     """Main entry point."""
     
+    # Packaged builds bundle every dependency; no venv needed
+    if getattr(sys, 'frozen', False):
+        run_directly()
+        return
+    
     # First, check if system GTK is available
     if not check_system_gtk():
         show_gtk_dialog(
@@ -396,24 +555,22 @@ def main():
         run_with_venv()
         return
     
-    # Deps not installed, ask user
-    proceed = show_gtk_dialog(
+    # Deps not installed, ask user and install in one setup window
+    installed = create_venv_and_install(
         "First-time Setup Required",
         "PulseLink needs to install some Python packages.\n\n"
         "This will create a local environment in:\n"
         f"{CONFIG_DIR}\n\n"
         "Packages to install:\n"
         f"{', '.join(REQUIRED_PACKAGES)}\n\n"
-        "This only needs to be done once.",
-        show_cancel=True
+        "This only needs to be done once."
     )
     
-    if not proceed:
+    if installed is None:
         print("Installation cancelled.")
         sys.exit(0)
     
-    # Install dependencies
-    if create_venv_and_install():
+    if installed:
         print("\nSetup complete! Launching PulseLink...")
         run_with_venv()
     else:
@@ -422,7 +579,7 @@ def main():
             "Failed to install dependencies.\n\n"
             "Please try running manually:\n"
             f"cd {APP_DIR}\n"
-            "pip install pulsectl sounddevice numpy scipy qrcode Pillow netifaces",
+            "pip install pulsectl sounddevice numpy scipy numba qrcode netifaces",
             show_cancel=False
         )
         sys.exit(1)
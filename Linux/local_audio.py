@@ -1,6 +1,7 @@
 import threading
 import subprocess
 import time
+import numpy as np
 from typing import Optional, Callable, List, Dict
 from dataclasses import dataclass
 from enum import Enum
@@ -11,6 +12,12 @@ try:
 except ImportError:
     PULSE_AVAILABLE = False
 
+try:
+    import alsaaudio
+    ALSA_AVAILABLE = True
+except ImportError:
+    ALSA_AVAILABLE = False
+
 
 class LocalAudioState(Enum):
     STOPPED = "stopped"
@@ -24,12 +31,29 @@ class AudioRoute:
     output_device: str
 
 
+# Sources whose names contain any of these are not offered as inputs
+SKIP_SOURCE_TOKENS = ('.monitor',)
+
+
 class LocalAudioCapture:
 
+    # How long a polled sink/source listing is reused when change
+    # events are unavailable (seconds)
+    DEVICE_CACHE_MAX_AGE = 0.5
+
+    # Window of each peak measurement on the captured source (seconds)
+    LEVEL_SAMPLE_TIME = 0.03
+
+    # Mono capture rate of the level-meter stream; peaks need no more
+    LEVEL_SAMPLE_RATE = 8000
+
     def __init__(self):
         self._pulse: Optional[pulsectl.Pulse] = None
         self._state = LocalAudioState.STOPPED
         self._lock = threading.Lock()
+        # Serializes every call on self._pulse: pulsectl clients are not
+        # thread-safe and the device-listing worker shares this one
+        self._pulse_lock = threading.Lock()
         self._pw_loopback_process: Optional[subprocess.Popen] = None
 
         self._on_state_change: Optional[
@@ -42,6 +66,32 @@ class LocalAudioCapture:
 
         self._current_route: Optional[AudioRoute] = None
 
+        # Latest input peak (0.0-1.0), written only by the level thread
+        self.last_level = 0.0
+        self._level_thread: Optional[threading.Thread] = None
+        self._level_process: Optional[subprocess.Popen] = None
+        self._level_running = False
+        self._alsa_mixers: Dict[str, object] = {}
+
+        # Listing records by device index, kept current from
+        # PulseAudio change events; readers use the tuple snapshots
+        self._sink_records: Dict[int, Dict] = {}
+        self._source_records: Dict[int, Dict] = {}
+        self._sink_snapshot: tuple = ()
+        self._source_snapshot: tuple = ()
+        self._records_live = False
+
+        # Full-listing fallback when the event connection is unavailable
+        self._sink_cache: List[Dict] = []
+        self._sink_cache_ts = 0.0
+        self._source_cache: List[Dict] = []
+        self._source_cache_ts = 0.0
+
+        self._event_pulse: Optional[pulsectl.Pulse] = None
+        self._event_thread: Optional[threading.Thread] = None
+        self._events_running = False
+        self._pending_events: list = []
+
         if PULSE_AVAILABLE:
             try:
                 self._pulse = pulsectl.Pulse(
@@ -49,6 +99,103 @@ class LocalAudioCapture:
                 )
             except Exception:
                 pass
+            else:
+                self._start_event_listener()
+
+    def _start_event_listener(self):
+        try:
+            self._event_pulse = pulsectl.Pulse(
+                'pulselink-local-events'
+            )
+            self._event_pulse.event_mask_set(
+                'sink', 'source', 'card'
+            )
+            self._event_pulse.event_callback_set(
+                self._on_pulse_event
+            )
+        except Exception:
+            self._event_pulse = None
+            return
+
+        self._events_running = True
+        self._event_thread = threading.Thread(
+            target=self._event_loop,
+            daemon=True,
+            name="LocalAudioEvents"
+        )
+        self._event_thread.start()
+
+    def _on_pulse_event(self, ev):
+        self._pending_events.append((ev.facility, ev.t, ev.index))
+        raise pulsectl.PulseLoopStop
+
+    def _event_loop(self):
+        try:
+            self._load_records()
+        except Exception:
+            self._events_running = False
+            return
+        self._records_live = True
+
+        while self._events_running:
+            try:
+                self._event_pulse.event_listen(timeout=0.5)
+            except Exception:
+                break
+
+            events, self._pending_events = self._pending_events, []
+            if events:
+                try:
+                    self._apply_events(events)
+                except Exception:
+                    break
+
+        self._records_live = False
+        self._events_running = False
+
+    def _load_records(self):
+        self._sink_records = {
+            sink.index: self._describe(sink)
+            for sink in self._event_pulse.sink_list()
+        }
+        self._source_records = {
+            source.index: self._describe(source)
+            for source in self._event_pulse.source_list()
+            if not self._skip_source(source.name)
+        }
+        self._sink_snapshot = tuple(self._sink_records.values())
+        self._source_snapshot = tuple(self._source_records.values())
+
+    def _apply_events(self, events):
+        for facility, event_type, index in events:
+            if facility == 'card':
+                # Port availability changed; re-read both lists once
+                self._load_records()
+                return
+
+            if facility == 'sink':
+                records = self._sink_records
+                lookup = self._event_pulse.sink_info
+            else:
+                records = self._source_records
+                lookup = self._event_pulse.source_info
+
+            if event_type == 'remove':
+                records.pop(index, None)
+                continue
+
+            try:
+                info = lookup(index)
+            except pulsectl.PulseIndexError:
+                records.pop(index, None)
+                continue
+
+            if facility == 'source' and self._skip_source(info.name):
+                continue
+            records[index] = self._describe(info)
+
+        self._sink_snapshot = tuple(self._sink_records.values())
+        self._source_snapshot = tuple(self._source_records.values())
 
     def set_callbacks(
         self,
@@ -83,33 +230,76 @@ class LocalAudioCapture:
         except Exception as exc:
             return False, str(exc)
 
+    def _find_sink(self, sink_name: str):
+        return self._pulse.get_sink_by_name(sink_name)
+
+    def _find_source(self, source_name: str):
+        return self._pulse.get_source_by_name(source_name)
+
+    def _alsa_mixer(self, control: str):
+        if not ALSA_AVAILABLE:
+            return None
+        if control not in self._alsa_mixers:
+            try:
+                self._alsa_mixers[control] = alsaaudio.Mixer(
+                    control, cardindex=0
+                )
+            except Exception:
+                self._alsa_mixers[control] = None
+        return self._alsa_mixers[control]
+
     def unmute_capture(self, source_name: str) -> bool:
-        self._run_cmd(
-            ['amixer', '-c', '0', 'set', 'Capture', '100%', 'on']
-        )
-        self._run_cmd(
-            ['pactl', 'set-source-mute', source_name, '0']
-        )
-        self._run_cmd(
-            ['pactl', 'set-source-volume', source_name, '100%']
-        )
+        mixer = self._alsa_mixer('Capture')
+        if mixer is not None:
+            try:
+                mixer.setvolume(100)
+                mixer.setrec(1)
+            except Exception:
+                pass
+        else:
+            self._run_cmd(
+                ['amixer', '-c', '0', 'set', 'Capture', '100%', 'on']
+            )
+
+        with self._pulse_lock:
+            if not self._pulse:
+                return False
+            try:
+                source = self._find_source(source_name)
+                self._pulse.mute(source, False)
+                self._pulse.volume_set_all_chans(source, 1.0)
+            except Exception:
+                return False
         return True
 
     def set_sink_port(
         self, sink_name: str, port_name: str
     ) -> bool:
-        success, _ = self._run_cmd(
-            ['pactl', 'set-sink-port', sink_name, port_name]
-        )
-        return success
+        with self._pulse_lock:
+            if not self._pulse:
+                return False
+            try:
+                sink = self._find_sink(sink_name)
+                self._pulse.port_set(sink, port_name)
+                # Active port changed; next polled listing must re-query
+                self._sink_cache_ts = 0.0
+                return True
+            except Exception:
+                return False
 
     def set_source_port(
         self, source_name: str, port_name: str
     ) -> bool:
-        success, _ = self._run_cmd(
-            ['pactl', 'set-source-port', source_name, port_name]
-        )
-        return success
+        with self._pulse_lock:
+            if not self._pulse:
+                return False
+            try:
+                source = self._find_source(source_name)
+                self._pulse.port_set(source, port_name)
+                self._source_cache_ts = 0.0
+                return True
+            except Exception:
+                return False
 
     def start_loopback(
         self,
@@ -149,6 +339,7 @@ class LocalAudioCapture:
                     output_device=sink_name
                 )
 
+                self._start_level_monitor(source_name)
                 self._set_state(LocalAudioState.RUNNING)
                 return True
 
@@ -160,7 +351,70 @@ class LocalAudioCapture:
                 )
             return False
 
+    def _start_level_monitor(self, source_name: str):
+        # One persistent record stream; get_peak_sample() would open and
+        # tear down a new stream for every measurement
+        try:
+            self._level_process = subprocess.Popen(
+                [
+                    'parec',
+                    '-d', source_name,
+                    '--format=s16le',
+                    '--channels=1',
+                    f'--rate={self.LEVEL_SAMPLE_RATE}',
+                    f'--latency-msec={int(self.LEVEL_SAMPLE_TIME * 1000)}',
+                ],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except Exception:
+            self._level_process = None
+            return
+        self._level_running = True
+        self._level_thread = threading.Thread(
+            target=self._level_loop,
+            args=(self._level_process.stdout,),
+            daemon=True,
+            name="LocalAudioLevel"
+        )
+        self._level_thread.start()
+
+    def _stop_level_monitor(self):
+        self._level_running = False
+        if self._level_process:
+            # Ending parec gives the level thread's read EOF
+            self._level_process.terminate()
+            try:
+                self._level_process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                self._level_process.kill()
+                self._level_process.wait(timeout=1)
+        if self._level_thread:
+            self._level_thread.join(timeout=1.0)
+            self._level_thread = None
+        if self._level_process:
+            self._level_process.stdout.close()
+            self._level_process = None
+        self.last_level = 0.0
+
+    def _level_loop(self, stream):
+        chunk = int(self.LEVEL_SAMPLE_RATE * self.LEVEL_SAMPLE_TIME) * 2
+        try:
+            while self._level_running:
+                data = stream.read(chunk)
+                if len(data) < 2:
+                    break
+                samples = np.frombuffer(data[:len(data) & ~1], dtype=np.int16)
+                self.last_level = min(
+                    np.abs(samples.astype(np.int32)).max() / 32768.0, 1.0
+                )
+        except Exception:
+            pass
+        finally:
+            self.last_level = 0.0
+
     def stop_loopback(self):
+        self._stop_level_monitor()
         try:
             with self._lock:
                 if self._pw_loopback_process:
@@ -175,69 +429,76 @@ class LocalAudioCapture:
                             timeout=1
                         )
                     self._pw_loopback_process = None
-
-                self._stop_speaker_watchdog()
         except Exception:
             pass
         finally:
             self._current_route = None
             self._set_state(LocalAudioState.STOPPED)
 
+    @staticmethod
+    def _describe(device) -> Dict:
+        return {
+            'name': device.name,
+            'description': device.description,
+            'ports': [
+                {
+                    'name': p.name,
+                    'description': p.description
+                }
+                for p in (device.port_list or [])
+            ],
+            'active_port': (
+                device.port_active.name
+                if device.port_active else None
+            )
+        }
+
+    @staticmethod
+    def _skip_source(name: str) -> bool:
+        return any(token in name for token in SKIP_SOURCE_TOKENS)
+
     def get_available_sources(self) -> List[Dict]:
         if not self._pulse:
             return []
-
-        sources = []
-        try:
-            for source in self._pulse.source_list():
-                if '.monitor' in source.name:
-                    continue
-                sources.append({
-                    'name': source.name,
-                    'description': source.description,
-                    'ports': [
-                        {
-                            'name': p.name,
-                            'description': p.description
-                        }
-                        for p in (source.port_list or [])
-                    ],
-                    'active_port': (
-                        source.port_active.name
-                        if source.port_active else None
-                    )
-                })
-        except Exception:
-            pass
-
-        return sources
+        if self._records_live:
+            return list(self._source_snapshot)
+
+        with self._pulse_lock:
+            if not self._pulse:
+                return []
+            now = time.monotonic()
+            if now - self._source_cache_ts > self.DEVICE_CACHE_MAX_AGE:
+                try:
+                    self._source_cache = [
+                        self._describe(source)
+                        for source in self._pulse.source_list()
+                        if not self._skip_source(source.name)
+                    ]
+                except Exception:
+                    return []
+                self._source_cache_ts = now
+            return list(self._source_cache)
 
     def get_available_sinks(self) -> List[Dict]:
         if not self._pulse:
             return []
-
-        sinks = []
-        try:
-            for sink in self._pulse.sink_list():
-                sinks.append({
-                    'name': sink.name,
-                    'description': sink.description,
-                    'ports': [
-                        {
-                            'name': p.name,
-                            'description': p.description
-                        }
-                        for p in (sink.port_list or [])
-                    ],
-                    'active_port': (
-                        sink.port_active.name
-                        if sink.port_active else None
-                    )
-                })
-        except Exception:
-            pass
-
-        return sinks
+        if self._records_live:
+            return list(self._sink_snapshot)
+
+        with self._pulse_lock:
+            if not self._pulse:
+                return []
+            now = time.monotonic()
+            if now - self._sink_cache_ts > self.DEVICE_CACHE_MAX_AGE:
+                try:
+                    self._sink_cache = [
+                        self._describe(sink)
+                        for sink in self._pulse.sink_list()
+                    ]
+                except Exception:
+                    return []
+                self._sink_cache_ts = now
+            return list(self._sink_cache)
 
     @property
     def state(self) -> LocalAudioState:
@@ -253,7 +514,17 @@ class LocalAudioCapture:
 
     def cleanup(self):
         self.stop_loopback()
-        with self._lock:
+        self._events_running = False
+        if self._event_thread:
+            self._event_thread.join(timeout=1.0)
+            self._event_thread = None
+        if self._event_pulse:
+            try:
+                self._event_pulse.close()
+            except Exception:
+                pass
+            self._event_pulse = None
+        with self._pulse_lock:
             if self._pulse:
                 try:
                     self._pulse.close()
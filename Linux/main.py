@@ -11,6 +11,9 @@ gi.require_version('Adw', '1')
 from gi.repository import Gtk, Adw, Gio, GLib, Gdk
 import sys
 import os
+import logging
+import logging.handlers
+import queue
 
 # Add the current directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -34,26 +37,8 @@ class PulseLinkApp(Adw.Application):
     def do_activate(self):
         if not self.window:
             self.window = MainWindow(application=self)
-            self._load_css()
         self.window.present()
         
-    def _load_css(self):
-        """Load custom CSS styles"""
-        css_provider = Gtk.CssProvider()
-        css_path = os.path.join(os.path.dirname(__file__), 'style.css')
-        
-        try:
-            css_provider.load_from_path(css_path)
-            display = Gdk.Display.get_default()
-            if display:
-                Gtk.StyleContext.add_provider_for_display(
-                    display,
-                    css_provider,
-                    Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
-                )
-        except Exception as e:
-            print(f"Warning: Could not load CSS: {e}")
-            
     def do_shutdown(self):
         """Clean shutdown"""
         if self.window and hasattr(self.window, 'cleanup'):
@@ -61,10 +46,43 @@ class PulseLinkApp(Adw.Application):
         Adw.Application.do_shutdown(self)
 
 
+def register_resources():
+    """Register the compiled resource bundle, when the build produced one"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pulselink.gresource')
+    try:
+        Gio.Resource.load(path)._register()
+    except GLib.Error:
+        pass  # Running from a source checkout; style.css is read from disk
+
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """Route log records through a queue so audio threads never block on stderr"""
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(
+        records, logging.StreamHandler(), respect_handler_level=True
+    )
+    root = logging.getLogger()
+    root.addHandler(logging.handlers.QueueHandler(records))
+    # PULSELINK_LOG=DEBUG shows diagnostic output
+    level = os.environ.get('PULSELINK_LOG', 'INFO').upper()
+    try:
+        root.setLevel(level)
+    except ValueError:
+        root.setLevel(logging.INFO)
+        root.warning("Unknown PULSELINK_LOG level %r, using INFO", level)
+    listener.start()
+    return listener
+
+
 def main():
     """Application entry point"""
-    app = PulseLinkApp()
-    return app.run(sys.argv)
+    listener = setup_logging()
+    register_resources()
+    try:
+        app = PulseLinkApp()
+        return app.run(sys.argv)
+    finally:
+        listener.stop()
 
 
 if __name__ == '__main__':
@@ -3,16 +3,18 @@ Audio Streaming Server
 Handles UDP audio packet reception and playback with low-latency optimizations
 """
 
+import logging
+import os
+import select
 import socket
 import threading
-import queue
 import struct
+import math
 import numpy as np
 from typing import Callable, Optional
 from dataclasses import dataclass
 from enum import Enum
 import time
-from scipy import signal
 
 # Import sounddevice for audio playback
 try:
@@ -22,6 +24,71 @@ except ImportError:
     SD_AVAILABLE = False
     print("Warning: sounddevice not available, audio playback disabled")
 
+# Numba compiles the low-pass biquad; scipy's lfilter is used without it
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+log = logging.getLogger('pulselink.audio')
+
+
+_BIQUAD_SRC = """
+@njit(fastmath=True)
+def biquad_df2t(x, z1, z2):
+    b0, b1, b2, a1, a2 = {!r}, {!r}, {!r}, {!r}, {!r}
+    for i in range(x.shape[0]):
+        xi = x[i]
+        yi = b0 * xi + z1
+        z1 = b1 * xi - a1 * yi + z2
+        z2 = b2 * xi - a2 * yi
+        x[i] = yi
+    return z1, z2
+"""
+
+
+def make_biquad(coeffs):
+    """Compile an in-place DF2T biquad with the coefficients as literals"""
+    namespace = {'njit': njit}
+    exec(_BIQUAD_SRC.format(*coeffs), namespace)
+    return namespace['biquad_df2t']
+
+
+def make_current_thread_realtime(priority: int):
+    """Best-effort SCHED_FIFO (and optional CPU pinning) for the calling thread"""
+    # On Linux pid 0 addresses the calling thread, not the whole process
+    core = os.environ.get('PULSELINK_RT_CORE')
+    if core is not None:
+        try:
+            os.sched_setaffinity(0, {int(core)})
+        except (AttributeError, ValueError, OSError):
+            pass
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+    except (AttributeError, OSError):
+        # Needs CAP_SYS_NICE or an rtprio limit; stay at normal priority
+        pass
+
+
+def butter_lowpass2(cutoff: float, sample_rate: float):
+    """Order-2 Butterworth low-pass (b, a), matching scipy.signal.butter"""
+    # Bilinear transform with frequency pre-warping
+    k = math.tan(math.pi * cutoff / sample_rate)
+    kk = k * k
+    norm = 1.0 / (1.0 + math.sqrt(2.0) * k + kk)
+    b0 = kk * norm
+    b = np.array([b0, 2.0 * b0, b0])
+    a = np.array([1.0, 2.0 * (kk - 1.0) * norm, (1.0 - math.sqrt(2.0) * k + kk) * norm])
+    return b, a
+
+
+# Not exported by the socket module; value from <asm-generic/socket.h>
+_SO_BUSY_POLL = getattr(socket, 'SO_BUSY_POLL', 46)
+
+# Packet header: big-endian 32-bit sequence number, read in place
+_unpack_seq = struct.Struct('>I').unpack_from
+
 
 class ServerState(Enum):
     STOPPED = "stopped"
@@ -49,18 +116,49 @@ class AudioServer:
     CHANNELS = 1
     FRAME_SIZE = 960
     BUFFER_SIZE = 2048
+    RECV_TIMEOUT_USEC = 500000
+    
+    # Socket receive buffer, and how long recv busy-polls the NIC (µs)
+    RECV_BUFFER_BYTES = 4 * 1024 * 1024
+    BUSY_POLL_USEC = 50
+    
+    # Most queued packets handed to the output stream in one write
+    MAX_BATCH_FRAMES = 4
+    
+    # Receive -> playback ring: slots allocated, and packets kept before
+    # the oldest is dropped to bound latency
+    RING_SLOTS = 8
+    MAX_QUEUED_FRAMES = 4
     
     # Volume boost
     VOLUME_GAIN = 4.0
     
+    # Sequence numbers tracked for duplicate detection
+    SEQ_WINDOW = 1024
+    _SEQ_MASK = (1 << SEQ_WINDOW) - 1
+    
+    # Minimum spacing between audio level callbacks (seconds)
+    LEVEL_INTERVAL = 0.03
+    
+    # Minimum spacing between repeated worker-thread error logs (seconds)
+    ERROR_LOG_INTERVAL = 1.0
+    
+    # SCHED_FIFO priorities; the receiver outranks playback
+    RECV_RT_PRIORITY = 20
+    PLAY_RT_PRIORITY = 18
+    
     def __init__(self, port: int = DEFAULT_PORT):
         self.port = port
         self.state = ServerState.STOPPED
         self._socket: Optional[socket.socket] = None
         self._receive_thread: Optional[threading.Thread] = None
         self._playback_thread: Optional[threading.Thread] = None
-        self._audio_queue: queue.Queue = queue.Queue(maxsize=6)
         self._running = False
+        self._last_error_log = 0.0
+        
+        # Set by each worker thread as it exits
+        self._recv_done = threading.Event()
+        self._play_done = threading.Event()
         
         # Callbacks
         self._on_state_change: Optional[Callable[[ServerState], None]] = None
@@ -71,14 +169,49 @@ class AudioServer:
         
         self._current_client: Optional[ClientInfo] = None
         self._output_stream = None
-        self._last_seq_num = -1
+        # Sequence dedup: newest number seen plus a bitset of the
+        # SEQ_WINDOW numbers below it (bit i set = top - i was seen)
+        self._seq_top = -1
+        self._seq_seen = 0
         
         # Low-pass filter coefficients (cut off high-frequency noise)
         # Butterworth filter, order 2, cutoff at 8kHz (most voice is below this)
-        nyquist = self.SAMPLE_RATE / 2
+        # Designed in closed form so scipy is only imported when lfilter is needed
         cutoff = 10000  # 10kHz cutoff - keeps voice clear, removes hiss
-        self._filter_b, self._filter_a = signal.butter(2, cutoff / nyquist, btype='low')
+        self._filter_b, self._filter_a = butter_lowpass2(cutoff, self.SAMPLE_RATE)
         self._filter_zi = None  # Filter state for continuous filtering
+        
+        # Same filter as plain biquad coefficients (a[0] is already 1)
+        self._biquad = tuple(
+            float(c) for c in (*self._filter_b, *self._filter_a[1:])
+        )
+        # Coefficients are fixed, so specialize the compiled filter on them
+        self._biquad_fn = make_biquad(self._biquad) if NUMBA_AVAILABLE else None
+        
+        # int16 -> [-1, 1) scaling folded together with the volume boost;
+        # the filter is linear, so applying gain before it is equivalent
+        self._gain = np.float32(self.VOLUME_GAIN / 32768.0)
+        
+        # Preallocated ring of converted frames (samples + per-slot lengths)
+        # handed from the receive thread to the playback thread
+        frame_capacity = self.BUFFER_SIZE // 2
+        self._ring = np.empty((self.RING_SLOTS, frame_capacity), dtype=np.float32)
+        self._ring_len = np.zeros(self.RING_SLOTS, dtype=np.intp)
+        self._ring_w = 0
+        self._ring_r = 0
+        self._ring_lock = threading.Lock()
+        
+        # Kernel eventfd wakes the playback thread when a frame is queued;
+        # threading.Event is the fallback where eventfd is unavailable
+        self._eventfd: Optional[int] = None
+        self._fill_event: Optional[threading.Event] = None
+        if hasattr(os, 'eventfd'):
+            self._eventfd = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+        else:
+            self._fill_event = threading.Event()
+        
+        # Playback buffer, sized for a full batch of the largest packets
+        self._fbuf = np.empty(frame_capacity * self.MAX_BATCH_FRAMES, dtype=np.float32)
             
     def set_callbacks(
         self,
@@ -104,17 +237,34 @@ class AudioServer:
             return False
             
         self._set_state(ServerState.STARTING)
-        self._last_seq_num = -1
-        self._filter_zi = signal.lfilter_zi(self._filter_b, self._filter_a)  # Reset filter state
+        self._seq_top = -1
+        self._seq_seen = 0
+        self._reset_ring()
+        if not NUMBA_AVAILABLE:
+            from scipy import signal
+            self._filter_zi = signal.lfilter_zi(self._filter_b, self._filter_a)  # Reset filter state
         
         try:
             self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 65536)
+            # Deep kernel buffer absorbs bursts while the receiver is preempted
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.RECV_BUFFER_BYTES)
+            try:
+                self._socket.setsockopt(socket.SOL_SOCKET, _SO_BUSY_POLL, self.BUSY_POLL_USEC)
+            except OSError:
+                # May need CAP_NET_ADMIN; busy polling is only an optimization
+                pass
             self._socket.bind(('0.0.0.0', self.port))
-            self._socket.settimeout(0.5)
+            # Kernel-side receive timeout on a blocking socket: Python's
+            # settimeout() would add a poll() syscall before every recvfrom
+            self._socket.setsockopt(
+                socket.SOL_SOCKET, socket.SO_RCVTIMEO,
+                struct.pack('ll', 0, self.RECV_TIMEOUT_USEC)
+            )
             
             self._running = True
+            self._recv_done.clear()
+            self._play_done.clear()
             
             self._receive_thread = threading.Thread(
                 target=self._receive_loop,
@@ -131,7 +281,7 @@ class AudioServer:
             self._playback_thread.start()
             
             self._set_state(ServerState.RUNNING)
-            print(f"Audio server started on port {self.port}")
+            log.info("Audio server started on port %d", self.port)
             return True
             
         except Exception as e:
@@ -144,41 +294,143 @@ class AudioServer:
         if self.state not in (ServerState.RUNNING, ServerState.STARTING):
             return
             
-        print("Stopping audio server...")
+        log.info("Stopping audio server...")
         self._set_state(ServerState.STOPPING)
         self._running = False
         
-        try:
-            self._audio_queue.put_nowait(None)
-        except:
-            pass
-        
-        time.sleep(0.1)
+        # Wake the playback thread so it sees the stop
+        self._signal_fill()
         
+        # Unblock a pending recvfrom; otherwise the receive loop notices
+        # the stop when its receive timeout expires
         if self._socket:
             try:
-                self._socket.close()
-            except:
+                self._socket.shutdown(socket.SHUT_RD)
+            except OSError:
                 pass
-            self._socket = None
         
         if self._receive_thread and self._receive_thread.is_alive():
-            self._receive_thread.join(timeout=0.5)
-            
+            self._recv_done.wait(timeout=0.5)
         if self._playback_thread and self._playback_thread.is_alive():
-            self._playback_thread.join(timeout=0.5)
-            
-        while not self._audio_queue.empty():
+            self._play_done.wait(timeout=0.5)
+        
+        if self._socket:
             try:
-                self._audio_queue.get_nowait()
+                self._socket.close()
             except:
                 pass
-                
+            self._socket = None
+            
+        self._reset_ring()
+        
         self._current_client = None
         self._set_state(ServerState.STOPPED)
-        print("Audio server stopped")
+        log.info("Audio server stopped")
+        
+    def _reset_ring(self):
+        with self._ring_lock:
+            self._ring_w = 0
+            self._ring_r = 0
+        self._drain_fill()
+        
+    def _signal_fill(self):
+        if self._eventfd is not None:
+            os.eventfd_write(self._eventfd, 1)
+        else:
+            self._fill_event.set()
+            
+    def _drain_fill(self):
+        if self._eventfd is not None:
+            try:
+                os.eventfd_read(self._eventfd)
+            except BlockingIOError:
+                pass
+        else:
+            self._fill_event.clear()
+            
+    def _wait_fill(self, timeout: float) -> bool:
+        """Block until a frame is signalled; consumes the signal"""
+        if self._eventfd is not None:
+            readable, _, _ = select.select([self._eventfd], [], [], timeout)
+            if not readable:
+                return False
+            self._drain_fill()
+            return True
+        if not self._fill_event.wait(timeout=timeout):
+            return False
+        self._fill_event.clear()
+        return True
+        
+    def _write_ring(self, data: bytes):
+        """Convert a packet's PCM payload straight into the next ring slot"""
+        samples = (len(data) - 4) // 2
+        if samples == 0:
+            return
+            
+        with self._ring_lock:
+            # Drop the oldest packet when playback falls behind
+            if self._ring_w - self._ring_r >= self.MAX_QUEUED_FRAMES:
+                self._ring_r = self._ring_w - self.MAX_QUEUED_FRAMES + 1
+            slot = self._ring_w % self.RING_SLOTS
+            
+        # The slot is unpublished and the reader never holds more than
+        # MAX_QUEUED_FRAMES < RING_SLOTS slots, so it can be filled unlocked
+        pcm = np.frombuffer(data, dtype='<i2', count=samples, offset=4)
+        np.multiply(pcm, self._gain, out=self._ring[slot, :samples], dtype=np.float32)
+        self._ring_len[slot] = samples
+        
+        with self._ring_lock:
+            self._ring_w += 1
+        self._signal_fill()
+        
+    def _read_ring(self, out: np.ndarray) -> int:
+        """Copy up to MAX_BATCH_FRAMES queued frames into out; returns samples copied"""
+        n = 0
+        with self._ring_lock:
+            end = min(self._ring_w, self._ring_r + self.MAX_BATCH_FRAMES)
+            while self._ring_r < end:
+                slot = self._ring_r % self.RING_SLOTS
+                length = self._ring_len[slot]
+                out[n:n + length] = self._ring[slot, :length]
+                n += length
+                self._ring_r += 1
+        return n
+        
+    def _log_error(self, msg: str, *args):
+        """Log a worker-thread error, at most once per ERROR_LOG_INTERVAL"""
+        now = time.monotonic()
+        if now - self._last_error_log >= self.ERROR_LOG_INTERVAL:
+            self._last_error_log = now
+            log.error(msg, *args)
+            
+    def _mark_seq(self, seq_num: int) -> bool:
+        """Record seq_num; returns False if it was already seen"""
+        behind = self._seq_top - seq_num
+        if abs(behind) >= self.SEQ_WINDOW:
+            # Outside the window either way: sender restarted or the counter
+            # wrapped, so start afresh rather than shifting by the whole gap
+            self._seq_seen = 1
+            self._seq_top = seq_num
+            return True
+        if behind < 0:
+            # Newer packet: slide the window forward
+            self._seq_seen = ((self._seq_seen << -behind) | 1) & self._SEQ_MASK
+            self._seq_top = seq_num
+            return True
+        bit = 1 << behind
+        if self._seq_seen & bit:
+            return False
+        self._seq_seen |= bit
+        return True
         
     def _receive_loop(self):
+        make_current_thread_realtime(self.RECV_RT_PRIORITY)
+        try:
+            self._receive_packets()
+        finally:
+            self._recv_done.set()
+            
+    def _receive_packets(self):
         while self._running:
             try:
                 if not self._socket:
@@ -189,13 +441,8 @@ class AudioServer:
                 if len(data) < 4:
                     continue
                     
-                seq_num = struct.unpack('>I', data[:4])[0]
-                audio_data = data[4:]
-                
-                # Skip duplicates
-                if seq_num <= self._last_seq_num and self._last_seq_num - seq_num < 1000:
+                if not self._mark_seq(_unpack_seq(data)[0]):
                     continue
-                self._last_seq_num = seq_num
                 
                 current_time = time.time()
                 if self._current_client is None or self._current_client.address != addr:
@@ -208,25 +455,18 @@ class AudioServer:
                         last_seen=current_time,
                         packet_count=1
                     )
-                    print(f"Client connected from {addr}")
+                    log.info("Client connected from %s", addr)
                     if self._on_client_connect:
                         self._on_client_connect(self._current_client)
                 else:
                     self._current_client.last_seen = current_time
                     self._current_client.packet_count += 1
                     
-                if len(audio_data) > 0:
-                    while self._audio_queue.qsize() >= 4:
-                        try:
-                            self._audio_queue.get_nowait()
-                        except:
-                            break
-                    try:
-                        self._audio_queue.put_nowait(audio_data)
-                    except queue.Full:
-                        pass
+                if len(data) > 4:
+                    self._write_ring(data)
                     
-            except socket.timeout:
+            except (socket.timeout, BlockingIOError):
+                # SO_RCVTIMEO expired with no packet
                 if self._current_client:
                     if time.time() - self._current_client.last_seen > 3.0:
                         if self._on_client_disconnect:
@@ -237,9 +477,16 @@ class AudioServer:
                 break
             except Exception as e:
                 if self._running:
-                    print(f"Receive error: {e}")
+                    self._log_error("Receive error: %s", e)
                     
     def _playback_loop(self):
+        make_current_thread_realtime(self.PLAY_RT_PRIORITY)
+        try:
+            self._play_audio()
+        finally:
+            self._play_done.set()
+            
+    def _play_audio(self):
         if not SD_AVAILABLE:
             if self._on_error:
                 self._on_error("sounddevice not available")
@@ -247,79 +494,107 @@ class AudioServer:
             
         stream = None
         filter_zi = self._filter_zi.copy() if self._filter_zi is not None else None
+        if not NUMBA_AVAILABLE:
+            from scipy import signal
         
         try:
-            print(f"Initializing audio output...")
-            
-            stream = sd.OutputStream(
-                samplerate=self.SAMPLE_RATE,
-                channels=self.CHANNELS,
-                dtype='float32',
-                blocksize=1024,
-                latency='high',
-            )
-            stream.start()
-            print(f"Audio playback: {self.SAMPLE_RATE}Hz, vol: {self.VOLUME_GAIN}x, filter: 10kHz LP")
+            if NUMBA_AVAILABLE:
+                # Trigger JIT compilation before audio starts flowing
+                biquad = self._biquad_fn
+                biquad(np.zeros(16, dtype=np.float32), 0.0, 0.0)
+                z1 = z2 = 0.0
+                
+            # The stream is opened once and reused across start()/stop()
+            if self._output_stream is None:
+                log.debug("Initializing audio output...")
+                self._output_stream = sd.OutputStream(
+                    samplerate=self.SAMPLE_RATE,
+                    channels=self.CHANNELS,
+                    dtype='float32',
+                    blocksize=1024,
+                    latency='high',
+                )
+            stream = self._output_stream
+            if not stream.active:
+                stream.start()
+            log.info("Audio playback: %dHz, vol: %sx, filter: 10kHz LP",
+                     self.SAMPLE_RATE, self.VOLUME_GAIN)
             
             level_counter = 0
+            last_level_time = 0.0
             
             while self._running:
                 try:
-                    audio_data = self._audio_queue.get(timeout=0.05)
-                    
-                    if audio_data is None:
-                        break
+                    if not self._wait_fill(0.05):
+                        if self._on_audio_level:
+                            self._on_audio_level(0.0)
+                        continue
                     
-                    # Convert to float32
-                    audio_int16 = np.frombuffer(audio_data, dtype='<i2')
-                    audio_float = audio_int16.astype(np.float32) / 32768.0
+                    # Take everything queued, up to one batch
+                    samples = self._read_ring(self._fbuf)
+                    if samples == 0:
+                        continue
+                    audio_float = self._fbuf[:samples]
                     
                     # Apply low-pass filter to remove high-frequency noise
-                    if filter_zi is not None:
-                        audio_float, filter_zi = signal.lfilter(
+                    if NUMBA_AVAILABLE:
+                        z1, z2 = biquad(audio_float, z1, z2)
+                    elif filter_zi is not None:
+                        # lfilter returns float64; store back into the float32 buffer
+                        audio_float[:], filter_zi = signal.lfilter(
                             self._filter_b, self._filter_a, 
                             audio_float, zi=filter_zi
                         )
                     else:
-                        audio_float = signal.lfilter(self._filter_b, self._filter_a, audio_float)
+                        audio_float[:] = signal.lfilter(self._filter_b, self._filter_a, audio_float)
                     
-                    # Apply volume boost
-                    audio_float = audio_float * self.VOLUME_GAIN
-                    audio_float = np.clip(audio_float, -1.0, 1.0)
-                    audio_float = audio_float.reshape(-1, 1).astype(np.float32)
+                    np.clip(audio_float, -1.0, 1.0, out=audio_float)
                         
                     # Audio level
                     level_counter += 1
-                    if self._on_audio_level and level_counter >= 2:
+                    now = time.monotonic()
+                    if (self._on_audio_level and level_counter >= 2 and
+                            now - last_level_time >= self.LEVEL_INTERVAL):
                         level_counter = 0
-                        rms = np.sqrt(np.mean(audio_float ** 2))
+                        last_level_time = now
+                        # Every 8th sample is plenty for a UI meter; np.dot
+                        # sums the squares without a temporary array
+                        sub = audio_float[::8]
+                        rms = math.sqrt(float(np.dot(sub, sub)) / sub.size)
                         self._on_audio_level(min(1.0, rms * 2))
                         
                     if stream and stream.active and self._running:
-                        stream.write(audio_float)
+                        # (N, 1) view of the contiguous buffer, no copy
+                        stream.write(audio_float[:, None])
                         
-                except queue.Empty:
-                    if self._on_audio_level:
-                        self._on_audio_level(0.0)
-                    continue
                 except Exception as e:
                     if self._running:
-                        print(f"Playback error: {e}")
+                        self._log_error("Playback error: %s", e)
                     
         except Exception as e:
-            print(f"Playback init error: {e}")
+            log.error("Playback init error: %s", e)
         finally:
             if stream:
                 try:
                     stream.stop()
                 except:
                     pass
-                try:
-                    stream.close()
-                except:
-                    pass
-            print("Audio playback stopped")
+            log.info("Audio playback stopped")
                 
+    def cleanup(self):
+        """Stop the server and release the audio output stream"""
+        self.stop()
+        if self._output_stream is not None:
+            try:
+                self._output_stream.close()
+            except:
+                pass
+            self._output_stream = None
+        if self._eventfd is not None:
+            os.close(self._eventfd)
+            self._eventfd = None
+            self._fill_event = threading.Event()
+            
     @property
     def is_running(self) -> bool:
         return self.state == ServerState.RUNNING
@@ -0,0 +1,31 @@
+"""Tests for AudioServer sequence-number dedup"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import AudioServer
+
+
+class MarkSeqTest(unittest.TestCase):
+    def setUp(self):
+        self.server = AudioServer()
+
+    def test_duplicate_rejected(self):
+        self.assertTrue(self.server._mark_seq(10))
+        self.assertTrue(self.server._mark_seq(9))
+        self.assertFalse(self.server._mark_seq(10))
+        self.assertFalse(self.server._mark_seq(9))
+
+    def test_large_forward_jump_stays_bounded(self):
+        self.assertTrue(self.server._mark_seq(1))
+        self.assertTrue(self.server._mark_seq(2 ** 31))
+        self.assertLessEqual(self.server._seq_seen.bit_length(), AudioServer.SEQ_WINDOW)
+        self.assertFalse(self.server._mark_seq(2 ** 31))
+        self.assertTrue(self.server._mark_seq(2 ** 31 - 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,11 +5,45 @@ Real-time audio level visualization using GTK DrawingArea
 
 import gi
 gi.require_version('Gtk', '4.0')
-from gi.repository import Gtk, GLib, Graphene
+from gi.repository import Gtk, Gdk, GLib, Graphene
 import cairo
+import logging
 import math
-from typing import List
-from collections import deque
+import sys
+import numpy as np
+
+# Byte layout of a native-endian premultiplied cairo ARGB32 pixel
+_CAIRO_MEMORY_FORMAT = (
+    Gdk.MemoryFormat.B8G8R8A8_PREMULTIPLIED if sys.byteorder == 'little'
+    else Gdk.MemoryFormat.A8R8G8B8_PREMULTIPLIED
+)
+
+# advance_levels() result flags
+LEVELS_MOVED = 1
+PIXELS_CHANGED = 2
+LEVELS_QUIET = 4
+
+log = logging.getLogger('pulselink.ui')
+
+
+def advance_levels(cur, tgt, alpha_q, pix_scale, pix):
+    """Step uint8 levels toward their targets and requantize to pixels"""
+    diff = tgt.astype(np.int32) - cur
+    # Rounded fixed-point step; always at least one unit toward the target
+    step = (diff * alpha_q + 128) >> 8
+    step = np.where(step == 0, np.sign(diff), step)
+    cur += step.astype(np.uint8)
+    
+    flags = 0
+    if diff.any():
+        flags |= LEVELS_MOVED
+    new_pix = (cur * pix_scale + 0.5).astype(np.int16)
+    if not np.array_equal(new_pix, pix):
+        pix[:] = new_pix
+        flags |= PIXELS_CHANGED
+    if np.all(cur < 3):  # ~0.01
+        flags |= LEVELS_QUIET
+    return flags
 
 
 class AudioVisualizer(Gtk.DrawingArea):
@@ -20,13 +54,23 @@ class AudioVisualizer(Gtk.DrawingArea):
     NUM_BARS = 12
     BAR_SPACING = 4
     CORNER_RADIUS = 4
-    ANIMATION_SPEED = 0.15  # Smoothing factor
+    ANIMATION_SPEED = 0.15  # Smoothing factor per frame at 60fps
+    
+    # Equivalent time constant, so smoothing is frame-rate independent
+    SMOOTHING_TAU = -(1 / 60) / math.log(1 - ANIMATION_SPEED)
     
     # Color gradient (blue theme)
     LOW_COLOR = (0.23, 0.51, 0.96)    # #3b82f6
     HIGH_COLOR = (0.38, 0.65, 0.98)   # #60a5fa
     PEAK_COLOR = (0.94, 0.27, 0.27)   # #ef4444
     
+    # Bar levels are stored as uint8, with LEVEL_MAX standing for 1.0
+    LEVEL_MAX = 255
+    
+    # Entries in the level -> color table; levels above 0.9 use PEAK_COLOR
+    COLOR_STEPS = 256
+    PEAK_STEP = 230
+    
     def __init__(self):
         super().__init__()
         
@@ -34,16 +78,69 @@ class AudioVisualizer(Gtk.DrawingArea):
         self.set_size_request(-1, 60)
         self.set_hexpand(True)
         
-        # Current and target levels for each bar
-        self._current_levels: List[float] = [0.0] * self.NUM_BARS
-        self._target_levels: List[float] = [0.0] * self.NUM_BARS
+        # Current and target levels for each bar, in 1/LEVEL_MAX units
+        self._current_levels = np.zeros(self.NUM_BARS, dtype=np.uint8)
+        self._target_levels = np.zeros(self.NUM_BARS, dtype=np.uint8)
+        
+        # Per-bar float targets before quantization, and variation scratch
+        self._target_scratch = np.zeros(self.NUM_BARS, dtype=np.float32)
+        self._variation = np.zeros(self.NUM_BARS, dtype=np.float32)
+        
+        # Bar heights in pixels as last painted, to skip identical frames
+        self._last_pixel_levels = np.zeros(self.NUM_BARS, dtype=np.int16)
+        
+        # Per-bar variation phase and fallback falloff used by set_level
+        bars = np.arange(self.NUM_BARS, dtype=np.float32)
+        self._bar_phase = bars * 0.5
+        self._bar_falloff = 1 - bars / self.NUM_BARS
+        
+        # Level history for smooth visualization: a ring of the last
+        # NUM_BARS levels, the next write position and the entries filled
+        self._hist = np.zeros(self.NUM_BARS, dtype=np.float32)
+        self._hist_pos = 0
+        self._hist_len = 0
+        self._last_level = 0.0
+        
+        # Newest-first ring order for each write position
+        ring = np.arange(self.NUM_BARS)
+        self._hist_order = (ring[:, None] - 1 - ring[None, :]) % self.NUM_BARS
         
-        # Level history for smooth visualization
-        self._level_history: deque = deque(maxlen=self.NUM_BARS)
+        # Bar color per quantized level: LOW_COLOR -> HIGH_COLOR, then peak
+        low = np.array(self.LOW_COLOR)
+        high = np.array(self.HIGH_COLOR)
+        t = np.linspace(0.0, 1.0, self.COLOR_STEPS)[:, None]
+        self._color_lut = low + (high - low) * t
+        self._color_lut[self.PEAK_STEP:] = self.PEAK_COLOR
+        
+        # Glow strength per entry: the bar color blended over the top of
+        # the gradient, rising from 0 at level 0.7
+        self._glow_lut = np.clip(t[:, 0] - 0.7, 0.0, None)
+        
+        # Unit-height fill gradients per table entry, built on first use;
+        # each bar maps one onto its own extent through the pattern matrix
+        self._bar_gradients: list = [None] * self.COLOR_STEPS
+        
+        # Rendered bars by pixel height, for the current bar geometry
+        self._sprites: dict = {}
+        self._sprite_geometry = None
+        
+        # The same sprites as GPU-uploadable textures, for do_snapshot
+        self._textures: dict = {}
+        self._use_textures = True
+        
+        # Cairo fallback: persistent composited frame and the bar pixel
+        # heights it shows
+        self._frame: cairo.ImageSurface = None
+        self._frame_pixels = np.full(self.NUM_BARS, -1, dtype=np.int16)
+        
+        # Rounded-rect outlines at the origin by (width, height, radius)
+        self._rrect_cache: dict = {}
+        self._path_ctx = cairo.Context(cairo.RecordingSurface(cairo.CONTENT_ALPHA, None))
         
         # Animation state
         self._is_active = False
-        self._animation_id: int = 0
+        self._tick_id: int = 0
+        self._last_frame_time: int = 0
         
         # Set up drawing
         self.set_draw_func(self._draw)
@@ -51,123 +148,296 @@ class AudioVisualizer(Gtk.DrawingArea):
     def set_level(self, level: float):
         """
         Set the current audio level (0.0 to 1.0)
-        This creates a visualization effect by distributing the level across bars
+        This creates a visualization effect by distributing the level across bars.
+        Safe to call from the audio thread; only the animation start is
+        handed to the main loop.
         """
         level = max(0.0, min(1.0, level))
+        self._last_level = level
         
         # Add to history
-        self._level_history.append(level)
-        
-        # Calculate target levels for each bar based on history
-        history_list = list(self._level_history)
-        for i in range(self.NUM_BARS):
-            if i < len(history_list):
-                # Use historical values with some variation
-                base = history_list[-(i + 1)] if (i + 1) <= len(history_list) else 0
-                # Add slight variation for visual interest
-                variation = math.sin(i * 0.5 + level * 10) * 0.1
-                self._target_levels[i] = max(0.0, min(1.0, base + variation))
-            else:
-                self._target_levels[i] = level * (1 - i / self.NUM_BARS)
+        self._hist[self._hist_pos] = level
+        self._hist_pos = (self._hist_pos + 1) % self.NUM_BARS
+        self._hist_len = min(self._hist_len + 1, self.NUM_BARS)
+        
+        # Bars with history show it newest-first, with slight variation
+        # for visual interest; the rest fall off from the current level.
+        # Everything is computed in preallocated buffers.
+        n = self._hist_len
+        targets = self._target_scratch
+        variation = self._variation[:n]
+        np.take(self._hist, self._hist_order[self._hist_pos, :n], out=targets[:n])
+        np.add(self._bar_phase[:n], level * 10, out=variation)
+        np.sin(variation, out=variation)
+        variation *= 0.1
+        targets[:n] += variation
+        np.clip(targets[:n], 0.0, 1.0, out=targets[:n])
+        np.multiply(self._bar_falloff[n:], level, out=targets[n:])
+        targets *= self.LEVEL_MAX
+        np.rint(targets, out=targets)
+        
+        # Repeats (e.g. steady silence) still scroll the history above, but
+        # when the bar targets come out the same there is nothing to redraw
+        if np.array_equal(self._target_levels, targets):
+            return
+        # One whole-array copy under the GIL, so the tick never sees a mix
+        self._target_levels[:] = targets
                 
         # Start animation if not running
         if not self._is_active:
-            self._start_animation()
+            GLib.idle_add(self._start_animation)
             
     def _start_animation(self):
         """Start the animation loop"""
-        if self._animation_id:
+        if self._tick_id:
             return
             
         self._is_active = True
-        self._animation_id = GLib.timeout_add(16, self._animate)  # ~60fps
+        self._last_frame_time = 0
+        # One tick per frame the compositor actually draws
+        self._tick_id = self.add_tick_callback(self._on_tick)
         
     def _stop_animation(self):
         """Stop the animation loop"""
-        if self._animation_id:
-            GLib.source_remove(self._animation_id)
-            self._animation_id = 0
+        if self._tick_id:
+            self.remove_tick_callback(self._tick_id)
+            self._tick_id = 0
         self._is_active = False
         
-    def _animate(self) -> bool:
-        """Animation tick - smooth transitions"""
-        any_change = False
-        
-        for i in range(self.NUM_BARS):
-            diff = self._target_levels[i] - self._current_levels[i]
-            if abs(diff) > 0.001:
-                # Smooth transition
-                self._current_levels[i] += diff * self.ANIMATION_SPEED
-                any_change = True
-            else:
-                self._current_levels[i] = self._target_levels[i]
-                
-        self.queue_draw()
+    def _on_tick(self, widget, frame_clock) -> bool:
+        """Frame clock tick - advance smoothing by the real frame interval"""
+        now = frame_clock.get_frame_time()
+        if self._last_frame_time:
+            dt = (now - self._last_frame_time) / 1e6
+        else:
+            dt = 1 / 60
+        self._last_frame_time = now
+        
+        if self._animate(1 - math.exp(-dt / self.SMOOTHING_TAU)):
+            return GLib.SOURCE_CONTINUE
+        return GLib.SOURCE_REMOVE
+        
+    def _animate(self, alpha: float) -> bool:
+        """Animation step - smooth transitions"""
+        # Smooth transition in fixed point (alpha in 1/256 units); the pixel
+        # heights are rounded the same way _draw picks its sprites. The level
+        # arrays are updated in place, never rebound.
+        pixel_scale = max(1, self.get_height() - 8) / self.LEVEL_MAX
+        flags = advance_levels(
+            self._current_levels, self._target_levels,
+            int(alpha * 256 + 0.5), pixel_scale, self._last_pixel_levels
+        )
+        
+        # Repaint only when some bar's pixel height changed
+        if flags & PIXELS_CHANGED:
+            self.queue_draw()
         
         # Keep animating while there are changes or level is above 0
-        if not any_change and all(l < 0.01 for l in self._current_levels):
+        if not flags & LEVELS_MOVED and flags & LEVELS_QUIET:
             self._is_active = False
-            self._animation_id = 0
+            self._tick_id = 0
             return False
             
         return True
         
-    def _draw(self, area, cr, width, height):
-        """Draw the visualization"""
-        # Calculate bar dimensions
+    @staticmethod
+    def _make_gradient(color, glow: float = 0.0) -> cairo.LinearGradient:
+        """Vertical gradient from a brightened color to the color over y in [0, 1]"""
+        r, g, b = color
+        # Glow blends the color over the whole bar; that only changes the
+        # brightened top stop, since the bottom stop is the color itself
+        top = [min(1, c * 1.3) * (1 - glow) + c * glow for c in color]
+        pattern = cairo.LinearGradient(0, 0, 0, 1)
+        pattern.add_color_stop_rgb(0, *top)
+        pattern.add_color_stop_rgb(1, r, g, b)
+        return pattern
+        
+    def _bar_geometry(self, width: int, height: int):
+        """Return (bar_width, max_height), dropping caches made for another size"""
         total_spacing = (self.NUM_BARS - 1) * self.BAR_SPACING
         bar_width = (width - total_spacing) / self.NUM_BARS
         max_height = height - 8  # Padding
+        if bar_width <= 0 or max_height <= 0:
+            return None
+            
+        # Sprites are only valid for the size and scale they were made at
+        geometry = (bar_width, max_height, self.get_scale_factor())
+        if geometry != self._sprite_geometry:
+            self._sprites.clear()
+            self._textures.clear()
+            self._rrect_cache.clear()
+            self._sprite_geometry = geometry
+            self._frame = None
+        return bar_width, max_height
         
-        # Draw each bar
-        for i in range(self.NUM_BARS):
-            x = i * (bar_width + self.BAR_SPACING)
-            level = self._current_levels[i]
-            bar_height = max(4, level * max_height)  # Minimum height
-            y = height - 4 - bar_height
+    def _sprite(self, pixels: int, bar_width: float, max_height: int) -> cairo.ImageSurface:
+        sprite = self._sprites.get(pixels)
+        if sprite is None:
+            sprite = self._render_sprite(pixels, bar_width, max_height)
+            self._sprites[pixels] = sprite
+        return sprite
+        
+    def _texture(self, pixels: int, bar_width: float, max_height: int) -> Gdk.Texture:
+        texture = self._textures.get(pixels)
+        if texture is None:
+            sprite = self._sprite(pixels, bar_width, max_height)
+            sprite.flush()
+            texture = Gdk.MemoryTexture.new(
+                sprite.get_width(),
+                sprite.get_height(),
+                _CAIRO_MEMORY_FORMAT,
+                GLib.Bytes.new(bytes(sprite.get_data())),
+                sprite.get_stride()
+            )
+            self._textures[pixels] = texture
+        return texture
+        
+    def do_snapshot(self, snapshot):
+        """Append one cached texture node per bar; GSK composites them on the GPU"""
+        if not self._use_textures:
+            Gtk.DrawingArea.do_snapshot(self, snapshot)
+            return
             
-            # Gradient color based on level
-            if level > 0.9:
-                r, g, b = self.PEAK_COLOR
-            else:
-                # Interpolate between low and high color
-                t = level
-                r = self.LOW_COLOR[0] + (self.HIGH_COLOR[0] - self.LOW_COLOR[0]) * t
-                g = self.LOW_COLOR[1] + (self.HIGH_COLOR[1] - self.LOW_COLOR[1]) * t
-                b = self.LOW_COLOR[2] + (self.HIGH_COLOR[2] - self.LOW_COLOR[2]) * t
+        height = self.get_height()
+        geometry = self._bar_geometry(self.get_width(), height)
+        if geometry is None:
+            return
+        bar_width, max_height = geometry
+        
+        # Hot-loop locals
+        inv_scale = 1 / self.get_scale_factor()
+        pixel_scale = max_height / self.LEVEL_MAX
+        pitch = bar_width + self.BAR_SPACING
+        bottom = height - 4
+        textures = self._textures
+        make_texture = self._texture
+        append_texture = snapshot.append_texture
+        
+        try:
+            for i, level in enumerate(self._current_levels.tolist()):
+                pixels = int(level * pixel_scale + 0.5)
+                texture = textures.get(pixels) or make_texture(pixels, bar_width, max_height)
+                append_texture(
+                    texture,
+                    Graphene.Rect().init(
+                        i * pitch, bottom - max(4, pixels),
+                        texture.get_width() * inv_scale, texture.get_height() * inv_scale
+                    )
+                )
+        except Exception as e:
+            # Fall back to the Cairo draw function from now on
+            log.warning("Texture rendering unavailable: %s", e)
+            self._use_textures = False
+            Gtk.DrawingArea.do_snapshot(self, snapshot)
+            
+    def _draw(self, area, cr, width, height):
+        """Draw the visualization (Cairo fallback)"""
+        geometry = self._bar_geometry(width, height)
+        if geometry is None:
+            return
+        bar_width, max_height = geometry
+        
+        if self._frame is None:
+            scale = self.get_scale_factor()
+            self._frame = cairo.ImageSurface(
+                cairo.FORMAT_ARGB32, math.ceil(width * scale), math.ceil(height * scale)
+            )
+            self._frame.set_device_scale(scale, scale)
+            self._frame_pixels.fill(-1)
+            
+        # Hot-loop locals
+        pixel_scale = max_height / self.LEVEL_MAX
+        pitch = bar_width + self.BAR_SPACING
+        frame_pixels = self._frame_pixels
+        column_width = math.ceil(bar_width)
+        fc = None
+        
+        # Re-blit only the bars whose pixel height changed since the last frame
+        for i, level in enumerate(self._current_levels.tolist()):
+            pixels = int(level * pixel_scale + 0.5)
+            if pixels == frame_pixels[i]:
+                continue
+            frame_pixels[i] = pixels
+            sprite = self._sprite(pixels, bar_width, max_height)
                 
-            # Draw rounded rectangle
-            self._draw_rounded_rect(cr, x, y, bar_width, bar_height, self.CORNER_RADIUS)
+            if fc is None:
+                fc = cairo.Context(self._frame)
+            x = i * pitch
+            fc.set_operator(cairo.OPERATOR_CLEAR)
+            fc.rectangle(x, 0, column_width, height)
+            fc.fill()
             
-            # Create gradient
-            pattern = cairo.LinearGradient(x, y, x, y + bar_height)
-            pattern.add_color_stop_rgb(0, min(1, r * 1.3), min(1, g * 1.3), min(1, b * 1.3))
-            pattern.add_color_stop_rgb(1, r, g, b)
+            bar_height = max(4, pixels)  # Minimum height
+            y = height - 4 - bar_height
+            fc.set_operator(cairo.OPERATOR_OVER)
+            fc.set_source_surface(sprite, x, y)
+            fc.rectangle(x, y, column_width, bar_height)
+            fc.fill()
             
-            cr.set_source(pattern)
-            cr.fill()
+        cr.set_source_surface(self._frame, 0, 0)
+        cr.paint()
+            
+    def _render_sprite(self, pixels: int, bar_width: float, max_height: int) -> cairo.ImageSurface:
+        """Render one bar of the given pixel height into an offscreen surface"""
+        scale = self.get_scale_factor()
+        bar_height = max(4, pixels)
+        surface = cairo.ImageSurface(
+            cairo.FORMAT_ARGB32,
+            math.ceil(bar_width * scale),
+            math.ceil(bar_height * scale)
+        )
+        surface.set_device_scale(scale, scale)
+        self._draw_bar(cairo.Context(surface), bar_width, bar_height, pixels / max_height)
+        return surface
+        
+    def _draw_bar(self, cr, width, height, level):
+        """Draw a single bar with its top-left corner at the origin"""
+        # Gradient color based on level
+        step = min(self.COLOR_STEPS - 1, int(level * (self.COLOR_STEPS - 1)))
+        pattern = self._bar_gradients[step]
+        if pattern is None:
+            color = self._color_lut[step].tolist()
+            pattern = self._make_gradient(color, float(self._glow_lut[step]))
+            self._bar_gradients[step] = pattern
+            
+        # Draw rounded rectangle
+        self._draw_rounded_rect(cr, 0, 0, width, height, self.CORNER_RADIUS)
+        
+        # Map the unit-height gradient onto the bar height
+        pattern.set_matrix(cairo.Matrix(yy=1 / height))
+        
+        cr.set_source(pattern)
+        cr.fill()
             
-            # Add glow effect for high levels
-            if level > 0.7:
-                self._draw_rounded_rect(cr, x, y, bar_width, bar_height, self.CORNER_RADIUS)
-                cr.set_source_rgba(r, g, b, 0.3 * (level - 0.7) / 0.3)
-                cr.fill()
-                
     def _draw_rounded_rect(self, cr, x, y, width, height, radius):
         """Draw a rounded rectangle path"""
-        radius = min(radius, width / 2, height / 2)
-        
+        key = (width, height, radius)
+        path = self._rrect_cache.get(key)
+        if path is None:
+            radius = min(radius, width / 2, height / 2)
+            
+            pc = self._path_ctx
+            pc.new_path()
+            pc.arc(width - radius, radius, radius, -math.pi / 2, 0)
+            pc.arc(width - radius, height - radius, radius, 0, math.pi / 2)
+            pc.arc(radius, height - radius, radius, math.pi / 2, math.pi)
+            pc.arc(radius, radius, radius, math.pi, 3 * math.pi / 2)
+            pc.close_path()
+            path = pc.copy_path()
+            self._rrect_cache[key] = path
+            
         cr.new_path()
-        cr.arc(x + width - radius, y + radius, radius, -math.pi / 2, 0)
-        cr.arc(x + width - radius, y + height - radius, radius, 0, math.pi / 2)
-        cr.arc(x + radius, y + height - radius, radius, math.pi / 2, math.pi)
-        cr.arc(x + radius, y + radius, radius, math.pi, 3 * math.pi / 2)
-        cr.close_path()
+        cr.save()
+        cr.translate(x, y)
+        cr.append_path(path)
+        cr.restore()
         
     def reset(self):
         """Reset all levels to zero"""
-        self._target_levels = [0.0] * self.NUM_BARS
-        self._level_history.clear()
+        self._target_levels.fill(0)
+        self._hist.fill(0.0)
+        self._hist_pos = 0
+        self._hist_len = 0
         self.queue_draw()
         
     def cleanup(self):
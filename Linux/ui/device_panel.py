@@ -18,6 +18,9 @@ from audio_manager import AudioManager, AudioDevice, DeviceType
 class DevicePanel(Gtk.Box):
     """Panel for selecting audio input and output devices"""
     
+    # Bursts of device changes within this window share one refresh (ms)
+    REFRESH_DELAY_MS = 50
+    
     def __init__(self, audio_manager: AudioManager):
         super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=16)
         
@@ -25,12 +28,25 @@ class DevicePanel(Gtk.Box):
         self._on_input_changed: Optional[Callable[[AudioDevice], None]] = None
         self._on_output_changed: Optional[Callable[[AudioDevice], None]] = None
         
+        # (name, display_name) of the devices each dropdown model was built from
+        self._input_sig: Optional[tuple] = None
+        self._output_sig: Optional[tuple] = None
+        
+        # Devices shown in each dropdown, and their positions by name
+        self._input_devices: List[AudioDevice] = []
+        self._output_devices: List[AudioDevice] = []
+        self._input_index: dict = {}
+        self._output_index: dict = {}
+        
+        # GLib source id of a scheduled (coalesced) dropdown refresh
+        self._pending_refresh = 0
+        
         self._setup_ui()
         self._refresh_devices()
         
         # Set up device change callback
         audio_manager.set_callbacks(
-            on_devices_changed=self._refresh_devices
+            on_devices_changed=self._on_devices_changed
         )
         
     def _setup_ui(self):
@@ -95,35 +111,54 @@ class DevicePanel(Gtk.Box):
         
         return section
         
+    def _on_devices_changed(self):
+        """Handle device list change (main thread; AudioManager marshals it here)"""
+        if not self._pending_refresh:
+            self._pending_refresh = GLib.timeout_add(
+                self.REFRESH_DELAY_MS, self._do_refresh
+            )
+            
+    def _do_refresh(self) -> bool:
+        """Run a scheduled refresh"""
+        self._pending_refresh = 0
+        self._refresh_devices()
+        return False
+        
     def _refresh_devices(self):
         """Refresh device dropdowns"""
         # Get devices
         input_devices = self.audio_manager.get_input_devices()
         output_devices = self.audio_manager.get_output_devices()
+        self._input_devices = input_devices
+        self._output_devices = output_devices
         
-        # Update input dropdown
-        input_names = [d.display_name for d in input_devices]
-        self.input_dropdown.set_model(Gtk.StringList.new(input_names))
+        # Update input dropdown (only rebuild the model when the list changed)
+        input_sig = tuple((d.name, d.display_name) for d in input_devices)
+        if input_sig != self._input_sig:
+            input_names = [d.display_name for d in input_devices]
+            self.input_dropdown.set_model(Gtk.StringList.new(input_names))
+            self._input_sig = input_sig
+            self._input_index = {d.name: i for i, d in enumerate(input_devices)}
         
         # Select current input
         current_input = self.audio_manager.get_current_input()
-        if current_input:
-            for i, device in enumerate(input_devices):
-                if device.name == current_input.name:
-                    self.input_dropdown.set_selected(i)
-                    break
+        idx = self._input_index.get(current_input.name) if current_input else None
+        if idx is not None and self.input_dropdown.get_selected() != idx:
+            self.input_dropdown.set_selected(idx)
                     
         # Update output dropdown
-        output_names = [d.display_name for d in output_devices]
-        self.output_dropdown.set_model(Gtk.StringList.new(output_names))
+        output_sig = tuple((d.name, d.display_name) for d in output_devices)
+        if output_sig != self._output_sig:
+            output_names = [d.display_name for d in output_devices]
+            self.output_dropdown.set_model(Gtk.StringList.new(output_names))
+            self._output_sig = output_sig
+            self._output_index = {d.name: i for i, d in enumerate(output_devices)}
         
         # Select current output
         current_output = self.audio_manager.get_current_output()
-        if current_output:
-            for i, device in enumerate(output_devices):
-                if device.name == current_output.name:
-                    self.output_dropdown.set_selected(i)
-                    break
+        idx = self._output_index.get(current_output.name) if current_output else None
+        if idx is not None and self.output_dropdown.get_selected() != idx:
+            self.output_dropdown.set_selected(idx)
                     
         # Update warning visibility
         self.warning_box.set_visible(self.audio_manager.has_headphone_conflict)
@@ -131,7 +166,7 @@ class DevicePanel(Gtk.Box):
     def _on_input_selected(self, dropdown, _pspec):
         """Handle input device selection"""
         selected = dropdown.get_selected()
-        devices = self.audio_manager.get_input_devices()
+        devices = self._input_devices
         
         if 0 <= selected < len(devices):
             device = devices[selected]
@@ -143,7 +178,7 @@ class DevicePanel(Gtk.Box):
     def _on_output_selected(self, dropdown, _pspec):
         """Handle output device selection"""
         selected = dropdown.get_selected()
-        devices = self.audio_manager.get_output_devices()
+        devices = self._output_devices
         
         if 0 <= selected < len(devices):
             device = devices[selected]
@@ -11,6 +11,9 @@ from gi.repository import Gtk, Adw, GLib, Gio
 import sys
 import os
 import threading
+import functools
+import logging
+from typing import Optional
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -21,13 +24,84 @@ from ui.qr_display import QRDisplay
 from ui.device_panel import DevicePanel
 from ui.audio_visualizer import AudioVisualizer
 
+log = logging.getLogger('pulselink.ui')
+
+
+def guarded(default=None, tick_attr: Optional[str] = None):
+    """Make a MainWindow callback return default instead of raising, and after cleanup()
+    
+    Failures are logged and shown in the error dialog. For tick callbacks,
+    tick_attr names the attribute holding the callback id; it is reset
+    whenever the guard makes GTK drop the callback.
+    """
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            if self._destroyed:
+                if tick_attr:
+                    setattr(self, tick_attr, 0)
+                return default
+            try:
+                return fn(self, *args, **kwargs)
+            except Exception as e:
+                log.exception("%s failed", fn.__name__)
+                if tick_attr:
+                    setattr(self, tick_attr, 0)
+                try:
+                    self._show_error(f"Internal error in {fn.__name__}: {e}")
+                except Exception:
+                    pass
+                return default
+        return wrapper
+    return deco
+
+
+# Overrides applied on CPU-rendered sessions, where shadows dominate paint time
+FAST_UI_CSS = "* { box-shadow: none; border-radius: 0; transition: none; }"
+
+# style.css inside the compiled resource bundle (loaded by Adw.Application)
+STYLE_RESOURCE = '/dev/uzair/pulselink/style.css'
+
+
+def style_is_bundled() -> bool:
+    """Check whether style.css is available from a registered resource"""
+    try:
+        Gio.resources_get_info(STYLE_RESOURCE, Gio.ResourceLookupFlags.NONE)
+        return True
+    except GLib.Error:
+        return False
+
 
 class MainWindow(Adw.ApplicationWindow):
     """Main application window for PulseLink"""
     
+    # Minimum spacing between level samples (microseconds of frame time)
+    LEVEL_METER_INTERVAL_US = 33000
+    
+    # An unchanged level (at 0.01 resolution) is skipped for up to this long,
+    # then forwarded anyway so the visualizer's history keeps scrolling on
+    # steady input; a multiple of the meter interval so repeats are dropped
+    LEVEL_REPEAT_INTERVAL_US = 4 * LEVEL_METER_INTERVAL_US
+    
+    # Widgets referenced from the window, dropped by cleanup()
+    _WIDGET_ATTRS = (
+        'status_dot', 'status_label', 'status_detail',
+        'local_mode_btn', 'android_mode_btn',
+        'input_dropdown', 'input_port_dropdown', 'output_dropdown', 'port_dropdown',
+        'local_audio_card', 'qr_card', 'qr_display', 'visualizer', 'main_button',
+        'content', '_refresh_spinner',
+    )
+    
+    # Display-wide CSS providers, parsed once and shared by every window
+    _css_provider = None
+    _fast_css_provider = None
+    
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         
+        # Set by cleanup(); guarded callbacks do nothing afterwards
+        self._destroyed = False
+        
         # Initialize components
         self.audio_manager = AudioManager()
         self.server = AudioServer(port=5555)
@@ -36,6 +110,20 @@ class MainWindow(Adw.ApplicationWindow):
         # Current mode: 'android' or 'local'
         self.current_mode = 'local'
         
+        # UI updates posted from worker threads, drained by one idle handler
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._idle_scheduled = False
+        
+        # Latest level from the server's playback thread (a plain float
+        # store), and the last level forwarded to the visualizer (hundredths)
+        self._server_level = 0.0
+        self._last_level_q = -1
+        
+        # Frame-clock level meter: tick id and (is_running, read_level) source
+        self._level_tick_id = 0
+        self._level_source = None
+        
         # Set up server callbacks
         self.server.set_callbacks(
             on_state_change=self._on_server_state_change,
@@ -63,18 +151,36 @@ class MainWindow(Adw.ApplicationWindow):
         
     def _load_css(self):
         """Load custom CSS"""
-        css_provider = Gtk.CssProvider()
-        css_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'style.css')
-        
-        try:
-            css_provider.load_from_path(css_path)
+        # Bundled builds: Adw.Application already applied style.css from the resource
+        if MainWindow._css_provider is None and not style_is_bundled():
+            css_provider = Gtk.CssProvider()
+            MainWindow._css_provider = css_provider
+            css_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'style.css')
+            
+            try:
+                css_provider.load_from_path(css_path)
+                Gtk.StyleContext.add_provider_for_display(
+                    self.get_display(),
+                    css_provider,
+                    Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
+                )
+            except Exception as e:
+                log.warning("Could not load CSS: %s", e)
+            
+        # Software rendering: drop shadows, rounding and transitions
+        if MainWindow._fast_css_provider is None and (
+                os.environ.get('GSK_RENDERER') == 'cairo' or os.environ.get('PULSELINK_FAST_UI')):
+            fast_provider = Gtk.CssProvider()
+            MainWindow._fast_css_provider = fast_provider
+            if hasattr(fast_provider, 'load_from_string'):
+                fast_provider.load_from_string(FAST_UI_CSS)
+            else:
+                fast_provider.load_from_data(FAST_UI_CSS.encode())
             Gtk.StyleContext.add_provider_for_display(
                 self.get_display(),
-                css_provider,
-                Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
+                fast_provider,
+                Gtk.STYLE_PROVIDER_PRIORITY_USER
             )
-        except Exception as e:
-            print(f"Warning: Could not load CSS: {e}")
             
     def _setup_ui(self):
         """Build the main UI"""
@@ -93,6 +199,11 @@ class MainWindow(Adw.ApplicationWindow):
         refresh_btn.connect("clicked", self._on_refresh_clicked)
         header.pack_start(refresh_btn)
         
+        # Shown while devices are being enumerated in the background
+        self._refresh_spinner = Gtk.Spinner()
+        self._refresh_spinner.set_visible(False)
+        header.pack_end(self._refresh_spinner)
+        
         # Scrollable content
         scroll = Gtk.ScrolledWindow()
         scroll.set_vexpand(True)
@@ -106,6 +217,7 @@ class MainWindow(Adw.ApplicationWindow):
         content.set_margin_top(8)
         content.set_margin_bottom(16)
         scroll.set_child(content)
+        self.content = content
         
         # Status Card
         status_card = self._create_status_card()
@@ -119,10 +231,9 @@ class MainWindow(Adw.ApplicationWindow):
         self.local_audio_card = self._create_local_audio_card()
         content.append(self.local_audio_card)
         
-        # QR Code Card (for Android mode)
-        self.qr_card = self._create_qr_card()
-        self.qr_card.set_visible(False)  # Hidden by default (local mode)
-        content.append(self.qr_card)
+        # QR Code Card (for Android mode), built on first switch to Android
+        self.qr_card = None
+        self.qr_display = None
         
         # Audio Visualizer Card
         visualizer_card = self._create_visualizer_card()
@@ -161,6 +272,7 @@ class MainWindow(Adw.ApplicationWindow):
         self.status_dot.set_size_request(12, 12)
         self.status_dot.add_css_class('status-dot')
         self.status_dot.add_css_class('disconnected')
+        self._dot_class = 'disconnected'
         header.append(self.status_dot)
         
         # Status text
@@ -201,12 +313,14 @@ class MainWindow(Adw.ApplicationWindow):
         self.local_mode_btn = Gtk.ToggleButton(label="Local Microphone")
         self.local_mode_btn.set_active(True)
         self.local_mode_btn.add_css_class('primary-button')
+        self._local_mode_class = 'primary-button'
         self.local_mode_btn.connect("toggled", self._on_mode_changed, 'local')
         mode_box.append(self.local_mode_btn)
         
         # Android button
         self.android_mode_btn = Gtk.ToggleButton(label="Android Device")
         self.android_mode_btn.add_css_class('secondary-button')
+        self._android_mode_class = 'secondary-button'
         self.android_mode_btn.connect("toggled", self._on_mode_changed, 'android')
         mode_box.append(self.android_mode_btn)
         
@@ -236,7 +350,8 @@ class MainWindow(Adw.ApplicationWindow):
         input_header.append(input_label)
         input_section.append(input_header)
         
-        self.input_dropdown = Gtk.DropDown()
+        self._input_model = Gtk.StringList()
+        self.input_dropdown = Gtk.DropDown(model=self._input_model)
         self.input_dropdown.set_hexpand(True)
         input_section.append(self.input_dropdown)
         
@@ -254,7 +369,8 @@ class MainWindow(Adw.ApplicationWindow):
         input_port_header.append(input_port_label)
         input_port_section.append(input_port_header)
         
-        self.input_port_dropdown = Gtk.DropDown()
+        self._input_port_model = Gtk.StringList()
+        self.input_port_dropdown = Gtk.DropDown(model=self._input_port_model)
         self.input_port_dropdown.set_hexpand(True)
         input_port_section.append(self.input_port_dropdown)
         
@@ -277,7 +393,8 @@ class MainWindow(Adw.ApplicationWindow):
         output_header.append(output_label)
         output_section.append(output_header)
         
-        self.output_dropdown = Gtk.DropDown()
+        self._output_model = Gtk.StringList()
+        self.output_dropdown = Gtk.DropDown(model=self._output_model)
         self.output_dropdown.set_hexpand(True)
         output_section.append(self.output_dropdown)
         
@@ -295,10 +412,25 @@ class MainWindow(Adw.ApplicationWindow):
         port_header.append(port_label)
         port_section.append(port_header)
         
-        self.port_dropdown = Gtk.DropDown()
+        self._port_model = Gtk.StringList()
+        self.port_dropdown = Gtk.DropDown(model=self._port_model)
         self.port_dropdown.set_hexpand(True)
         port_section.append(self.port_dropdown)
         
+        # Names currently shown by each persistent model
+        self._model_names = {}
+        
+        # Filled in once the background enumeration completes
+        self._input_sources = []
+        self._output_sinks = []
+        self._current_input_ports = []
+        self._current_ports = []
+        self._enumerating = False
+        
+        # Signatures of the listings the dropdowns were last built from
+        self._last_src_sig = None
+        self._last_sink_sig = None
+        
         # Populate dropdowns
         self._populate_audio_dropdowns()
         
@@ -309,28 +441,85 @@ class MainWindow(Adw.ApplicationWindow):
         return card
         
     def _populate_audio_dropdowns(self):
-        """Populate the audio device dropdowns"""
-        # Get sources and sinks
-        sources = self.local_audio.get_available_sources()
-        sinks = self.local_audio.get_available_sinks()
-        
-        # Populate input dropdown
-        input_names = [s['description'] for s in sources]
-        self.input_dropdown.set_model(Gtk.StringList.new(input_names))
-        self._input_sources = sources
-        
-        # Populate input port dropdown for first source
-        if sources:
-            self._update_input_port_dropdown(sources[0])
+        """Enumerate audio devices on a worker thread and populate the dropdowns"""
+        if self._enumerating:
+            return
+        self._enumerating = True
+        self._refresh_spinner.set_visible(True)
+        self._refresh_spinner.start()
+        threading.Thread(
+            target=self._enumerate_devices,
+            daemon=True,
+            name="DeviceEnumeration"
+        ).start()
+        
+    def _enumerate_devices(self):
+        """Query sources and sinks (worker thread)"""
+        try:
+            sources = self.local_audio.get_available_sources()
+            sinks = self.local_audio.get_available_sinks()
+        except Exception:
+            sources, sinks = [], []
+        self._post('devices', self._apply_devices, sources, sinks)
+        
+    @guarded()
+    def _apply_devices(self, sources: list, sinks: list):
+        """Populate the audio device dropdowns (main thread)"""
+        self._enumerating = False
+        self._refresh_spinner.stop()
+        self._refresh_spinner.set_visible(False)
+        
+        # Populate input dropdown (skipped when the listing is unchanged)
+        src_sig = self._device_signature(sources)
+        if src_sig != self._last_src_sig:
+            self._last_src_sig = src_sig
+            previous = self._selected_device_name(self.input_dropdown, self._input_sources)
+            self._input_sources = sources
+            self._set_model_names(self._input_model, [s['description'] for s in sources])
+            
+            # splice() keeps the selected position, which may now be another device
+            if sources:
+                idx = self._reselect_device(self.input_dropdown, sources, previous)
+                self._update_input_port_dropdown(sources[idx])
         
         # Populate output dropdown
-        output_names = [s['description'] for s in sinks]
-        self.output_dropdown.set_model(Gtk.StringList.new(output_names))
-        self._output_sinks = sinks
-        
-        # Populate output port dropdown for first sink
-        if sinks:
-            self._update_port_dropdown(sinks[0])
+        sink_sig = self._device_signature(sinks)
+        if sink_sig != self._last_sink_sig:
+            self._last_sink_sig = sink_sig
+            previous = self._selected_device_name(self.output_dropdown, self._output_sinks)
+            self._output_sinks = sinks
+            self._set_model_names(self._output_model, [s['description'] for s in sinks])
+            
+            if sinks:
+                idx = self._reselect_device(self.output_dropdown, sinks, previous)
+                self._update_port_dropdown(sinks[idx])
+                
+    @staticmethod
+    def _selected_device_name(dropdown: Gtk.DropDown, devices: list) -> Optional[str]:
+        """Name of the device a dropdown currently selects, if any"""
+        selected = dropdown.get_selected()
+        if 0 <= selected < len(devices):
+            return devices[selected]['name']
+        return None
+        
+    @staticmethod
+    def _reselect_device(dropdown: Gtk.DropDown, devices: list, name: Optional[str]) -> int:
+        """Select the device called name again, or the first one; returns its index"""
+        idx = next((i for i, d in enumerate(devices) if d['name'] == name), 0)
+        dropdown.set_selected(idx)
+        return idx
+        
+    @staticmethod
+    def _device_signature(devices: list) -> tuple:
+        """Identify a device listing by what the dropdowns show of it"""
+        return tuple((d['name'], d['description'], d.get('active_port')) for d in devices)
+            
+    def _set_model_names(self, model: Gtk.StringList, names: list):
+        """Replace a dropdown model's items in one splice, unless they are unchanged"""
+        if self._model_names.get(model) == names:
+            return
+        model.splice(0, model.get_n_items(), names)
+        self._model_names[model] = names
             
     def _update_input_port_dropdown(self, source: dict):
         """Update input port dropdown for selected source"""
@@ -338,19 +527,16 @@ class MainWindow(Adw.ApplicationWindow):
         port_names = [p['description'] for p in ports]
         
         if port_names:
-            self.input_port_dropdown.set_model(Gtk.StringList.new(port_names))
             self._current_input_ports = ports
+            self._set_model_names(self._input_port_model, port_names)
             
             # Select active port
-            active_port = source.get('active_port')
-            if active_port:
-                for i, port in enumerate(ports):
-                    if port['name'] == active_port:
-                        self.input_port_dropdown.set_selected(i)
-                        break
+            idx = {p['name']: i for i, p in enumerate(ports)}.get(source.get('active_port'))
+            if idx is not None:
+                self.input_port_dropdown.set_selected(idx)
         else:
-            self.input_port_dropdown.set_model(Gtk.StringList.new(["Default"]))
             self._current_input_ports = []
+            self._set_model_names(self._input_port_model, ["Default"])
             
     def _update_port_dropdown(self, sink: dict):
         """Update output port dropdown for selected sink"""
@@ -358,20 +544,18 @@ class MainWindow(Adw.ApplicationWindow):
         port_names = [p['description'] for p in ports]
         
         if port_names:
-            self.port_dropdown.set_model(Gtk.StringList.new(port_names))
             self._current_ports = ports
+            self._set_model_names(self._port_model, port_names)
             
             # Select active port
-            active_port = sink.get('active_port')
-            if active_port:
-                for i, port in enumerate(ports):
-                    if port['name'] == active_port:
-                        self.port_dropdown.set_selected(i)
-                        break
+            idx = {p['name']: i for i, p in enumerate(ports)}.get(sink.get('active_port'))
+            if idx is not None:
+                self.port_dropdown.set_selected(idx)
         else:
-            self.port_dropdown.set_model(Gtk.StringList.new(["Default"]))
             self._current_ports = []
+            self._set_model_names(self._port_model, ["Default"])
             
+    @guarded()
     def _on_input_device_selected(self, dropdown, _pspec):
         """Handle input device selection"""
         selected = dropdown.get_selected()
@@ -379,6 +563,7 @@ class MainWindow(Adw.ApplicationWindow):
             source = self._input_sources[selected]
             self._update_input_port_dropdown(source)
             
+    @guarded()
     def _on_output_device_selected(self, dropdown, _pspec):
         """Handle output device selection"""
         selected = dropdown.get_selected()
@@ -424,12 +609,14 @@ class MainWindow(Adw.ApplicationWindow):
         """Create the main control button"""
         button = Gtk.Button(label="▶ Start Audio")
         button.add_css_class('primary-button')
+        self._main_button_class = 'primary-button'
         button.set_margin_top(16)
         button.connect("clicked", self._on_main_button_clicked)
         return button
         
     # Event Handlers
     
+    @guarded()
     def _on_mode_changed(self, button, mode):
         """Handle mode toggle"""
         if not button.get_active():
@@ -441,31 +628,32 @@ class MainWindow(Adw.ApplicationWindow):
         if mode == 'local':
             self.local_mode_btn.set_active(True)
             self.android_mode_btn.set_active(False)
-            self.local_mode_btn.remove_css_class('secondary-button')
-            self.local_mode_btn.add_css_class('primary-button')
-            self.android_mode_btn.remove_css_class('primary-button')
-            self.android_mode_btn.add_css_class('secondary-button')
+            self._set_state_class(self.local_mode_btn, 'primary-button', '_local_mode_class')
+            self._set_state_class(self.android_mode_btn, 'secondary-button', '_android_mode_class')
             
             # Show/hide cards
             self.local_audio_card.set_visible(True)
-            self.qr_card.set_visible(False)
+            if self.qr_card:
+                self.qr_card.set_visible(False)
             
             self.status_detail.set_text("Local microphone → Speakers")
             
         else:  # android mode
             self.android_mode_btn.set_active(True)
             self.local_mode_btn.set_active(False)
-            self.android_mode_btn.remove_css_class('secondary-button')
-            self.android_mode_btn.add_css_class('primary-button')
-            self.local_mode_btn.remove_css_class('primary-button')
-            self.local_mode_btn.add_css_class('secondary-button')
+            self._set_state_class(self.android_mode_btn, 'primary-button', '_android_mode_class')
+            self._set_state_class(self.local_mode_btn, 'secondary-button', '_local_mode_class')
             
             # Show/hide cards
             self.local_audio_card.set_visible(False)
+            if self.qr_card is None:
+                self.qr_card = self._create_qr_card()
+                self.content.insert_child_after(self.qr_card, self.local_audio_card)
             self.qr_card.set_visible(True)
             
             self.status_detail.set_text("Scan QR with Android app")
             
+    @guarded()
     def _on_main_button_clicked(self, button):
         """Handle main button click"""
         if self.current_mode == 'local':
@@ -497,7 +685,7 @@ class MainWindow(Adw.ApplicationWindow):
         sink_name = sink['name']
 
         input_port_idx = self.input_port_dropdown.get_selected()
-        if hasattr(self, '_current_input_ports') and self._current_input_ports:
+        if self._current_input_ports:
             if 0 <= input_port_idx < len(self._current_input_ports):
                 input_port = self._current_input_ports[input_port_idx]
                 self.local_audio.set_source_port(
@@ -505,7 +693,7 @@ class MainWindow(Adw.ApplicationWindow):
                 )
 
         port_idx = self.port_dropdown.get_selected()
-        if hasattr(self, '_current_ports') and self._current_ports:
+        if self._current_ports:
             if 0 <= port_idx < len(self._current_ports):
                 port = self._current_ports[port_idx]
                 self.local_audio.set_sink_port(
@@ -514,21 +702,21 @@ class MainWindow(Adw.ApplicationWindow):
 
         success = self.local_audio.start_loopback(
             source_name=source_name,
-            sink_name=sink_name,
-            force_speaker_port=False,
-            mute_headphones=False
+            sink_name=sink_name
         )
         
         if success:
             self.main_button.set_label("⏹ Stop Audio")
-            self.main_button.remove_css_class('primary-button')
-            self.main_button.add_css_class('danger-button')
+            self._set_state_class(self.main_button, 'danger-button', '_main_button_class')
             self.status_label.set_text("Audio Active")
             self.status_detail.set_text(f"{source['description']} → Speakers")
             self._update_status_dot('connected')
             
-            # Show a simulated audio level (since loopback doesn't give us levels directly)
-            self._start_simulated_visualizer()
+            # Feed the visualizer from the input peak meter
+            self._start_level_meter(
+                lambda: self.local_audio.is_running,
+                lambda: self.local_audio.last_level
+            )
         else:
             self._show_error("Failed to start audio routing")
             
@@ -536,45 +724,85 @@ class MainWindow(Adw.ApplicationWindow):
         """Stop local audio routing"""
         self.local_audio.stop_loopback()
         self.main_button.set_label("▶ Start Audio")
-        self.main_button.remove_css_class('danger-button')
-        self.main_button.add_css_class('primary-button')
+        self._set_state_class(self.main_button, 'primary-button', '_main_button_class')
         self.status_label.set_text("Ready")
         self.status_detail.set_text("Select input and output, then start")
         self._update_status_dot('disconnected')
         self.visualizer.reset()
-        self._stop_simulated_visualizer()
+        self._stop_level_meter()
         
-    def _start_simulated_visualizer(self):
-        """Start a simulated visualizer (since loopback doesn't provide level callbacks)"""
-        import random
-        
-        def update_level():
-            if self.local_audio.is_running:
-                # Simulate audio activity with random levels
-                level = random.uniform(0.2, 0.7)
-                self.visualizer.set_level(level)
-                return True
-            return False
+    def _start_level_meter(self, is_running, read_level):
+        """Poll read_level once per frame (throttled to ~30 Hz) while is_running() holds"""
+        self._level_source = (is_running, read_level)
+        self._last_level_q = -1
+        if self._level_tick_id:
+            return
+        self._last_level_time = 0
+        self._last_forward_time = 0
+        self._level_tick_id = self.visualizer.add_tick_callback(self._on_level_tick)
+        
+    def _stop_level_meter(self):
+        if self._level_tick_id:
+            self.visualizer.remove_tick_callback(self._level_tick_id)
+            self._level_tick_id = 0
             
-        self._visualizer_timer = GLib.timeout_add(100, update_level)
-        
-    def _stop_simulated_visualizer(self):
-        if hasattr(self, '_visualizer_timer') and self._visualizer_timer is not None:
-            GLib.source_remove(self._visualizer_timer)
-            self._visualizer_timer = None
+    @guarded(default=False, tick_attr='_level_tick_id')
+    def _on_level_tick(self, widget, frame_clock) -> bool:
+        """Frame clock tick - hand the latest measured level to the visualizer"""
+        is_running, read_level = self._level_source
+        if not is_running():
+            self._level_tick_id = 0
+            return GLib.SOURCE_REMOVE
+            
+        now = frame_clock.get_frame_time()
+        if now - self._last_level_time >= self.LEVEL_METER_INTERVAL_US:
+            self._last_level_time = now
+            level = read_level()
+            # Repeats are skipped only within the repeat deadline
+            q = int(level * 100)
+            if (q != self._last_level_q or
+                    now - self._last_forward_time >= self.LEVEL_REPEAT_INTERVAL_US):
+                self._last_level_q = q
+                self._last_forward_time = now
+                self.visualizer.set_level(level)
+        return GLib.SOURCE_CONTINUE
             
+    @guarded()
     def _on_refresh_clicked(self, button):
         """Handle refresh button click"""
         self._populate_audio_dropdowns()
-        if self.current_mode == 'android':
+        if self.current_mode == 'android' and self.qr_display:
+            self.qr_display.invalidate_ip_cache()
             self.qr_display.regenerate()
         
     # Local Audio Callbacks
     
+    def _post(self, key, fn, *args):
+        """Queue a main-thread update; a newer update with the same key replaces it"""
+        with self._pending_lock:
+            # Re-inserting moves the key to the end, keeping event order
+            self._pending.pop(key, None)
+            self._pending[key] = (fn, args)
+            if self._idle_scheduled:
+                return
+            self._idle_scheduled = True
+        GLib.idle_add(self._drain)
+        
+    @guarded(default=False)
+    def _drain(self):
+        """Apply all pending updates (main thread)"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            self._idle_scheduled = False
+        for fn, args in pending.values():
+            fn(*args)
+        return False
+        
     def _on_local_audio_state_change(self, state: LocalAudioState):
         """Handle local audio state change"""
-        GLib.idle_add(self._update_local_audio_state, state)
+        self._post('local_state', self._update_local_audio_state, state)
         
+    @guarded()
     def _update_local_audio_state(self, state: LocalAudioState):
         """Update UI for local audio state"""
         if state == LocalAudioState.RUNNING:
@@ -586,14 +814,15 @@ class MainWindow(Adw.ApplicationWindow):
             
     def _on_local_audio_error(self, error: str):
         """Handle local audio error"""
-        GLib.idle_add(self._show_error, error)
+        self._post(('error', error), self._show_error, error)
         
     # Server Callbacks (for Android mode)
     
     def _on_server_state_change(self, state: ServerState):
         """Handle server state change"""
-        GLib.idle_add(self._update_server_state, state)
+        self._post('server_state', self._update_server_state, state)
         
+    @guarded()
     def _update_server_state(self, state: ServerState):
         """Update UI for server state (main thread)"""
         if self.current_mode != 'android':
@@ -601,19 +830,22 @@ class MainWindow(Adw.ApplicationWindow):
             
         if state == ServerState.RUNNING:
             self.main_button.set_label("⏹ Stop Server")
-            self.main_button.remove_css_class('primary-button')
-            self.main_button.add_css_class('danger-button')
+            self._set_state_class(self.main_button, 'danger-button', '_main_button_class')
             self.status_label.set_text("Waiting for Connection")
             self.status_detail.set_text("Scan QR code with Android app")
             self._update_status_dot('waiting')
+            self._start_level_meter(
+                lambda: self.server.is_running,
+                lambda: self._server_level
+            )
         elif state == ServerState.STOPPED:
             self.main_button.set_label("▶ Start Server")
-            self.main_button.remove_css_class('danger-button')
-            self.main_button.add_css_class('primary-button')
+            self._set_state_class(self.main_button, 'primary-button', '_main_button_class')
             self.status_label.set_text("Server Stopped")
             self.status_detail.set_text("Start server for Android audio")
             self._update_status_dot('disconnected')
             self.visualizer.reset()
+            self._stop_level_meter()
         elif state == ServerState.STARTING:
             self.main_button.set_label("Starting...")
             self.main_button.set_sensitive(False)
@@ -626,7 +858,7 @@ class MainWindow(Adw.ApplicationWindow):
             
     def _on_client_connect(self, client: ClientInfo):
         """Handle client connection"""
-        GLib.idle_add(self._update_client_connected, client)
+        self._post('client', self._update_client_connected, client)
         
     def _update_client_connected(self, client: ClientInfo):
         """Update UI for client connection (main thread)"""
@@ -637,7 +869,7 @@ class MainWindow(Adw.ApplicationWindow):
         
     def _on_client_disconnect(self, client: ClientInfo):
         """Handle client disconnection"""
-        GLib.idle_add(self._update_client_disconnected)
+        self._post('client', self._update_client_disconnected)
         
     def _update_client_disconnected(self):
         """Update UI for client disconnection (main thread)"""
@@ -648,12 +880,13 @@ class MainWindow(Adw.ApplicationWindow):
             self.visualizer.reset()
             
     def _on_audio_level(self, level: float):
-        """Handle audio level update"""
-        GLib.idle_add(self.visualizer.set_level, level)
+        """Handle audio level update (called on the playback thread)"""
+        # Picked up by the level meter tick; no main-loop dispatch per level
+        self._server_level = level
         
     def _on_server_error(self, error: str):
         """Handle server error"""
-        GLib.idle_add(self._show_error, error)
+        self._post(('error', error), self._show_error, error)
         
     def _show_error(self, error: str):
         """Show error dialog (main thread)"""
@@ -667,15 +900,30 @@ class MainWindow(Adw.ApplicationWindow):
         
     def _update_status_dot(self, state: str):
         """Update status indicator"""
-        self.status_dot.remove_css_class('connected')
-        self.status_dot.remove_css_class('disconnected')
-        self.status_dot.remove_css_class('waiting')
-        self.status_dot.add_css_class(state)
+        self._set_state_class(self.status_dot, state, '_dot_class')
+        
+    def _set_state_class(self, widget: Gtk.Widget, new_class: str, cache_attr: str):
+        """Swap a widget's state class, touching its style only when it changes"""
+        old_class = getattr(self, cache_attr, None)
+        if old_class == new_class:
+            return
+        if old_class:
+            widget.remove_css_class(old_class)
+        widget.add_css_class(new_class)
+        setattr(self, cache_attr, new_class)
         
     def cleanup(self):
         """Clean up resources"""
-        self._stop_simulated_visualizer()
+        self._destroyed = True
+        self._stop_level_meter()
         self.local_audio.cleanup()
-        self.server.stop()
+        self.server.cleanup()
         self.audio_manager.cleanup()
         self.visualizer.cleanup()
+        
+        # Release the widget tree now rather than whenever the window is collected
+        with self._pending_lock:
+            self._pending.clear()
+        self.set_content(None)
+        for name in self._WIDGET_ATTRS:
+            setattr(self, name, None)
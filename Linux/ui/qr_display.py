@@ -5,35 +5,113 @@ Generates and displays a QR code with server connection info
 
 import gi
 gi.require_version('Gtk', '4.0')
-from gi.repository import Gtk, GdkPixbuf, GLib
+from gi.repository import Gtk, Gdk, GLib
 
-import io
+import fcntl
+import importlib
 import json
+import logging
 import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
 from typing import Optional
+import numpy as np
 
-try:
-    import qrcode
-    from PIL import Image
-    QR_AVAILABLE = True
-except ImportError:
-    QR_AVAILABLE = False
-    print("Warning: qrcode/PIL not available")
+log = logging.getLogger('pulselink.ui')
 
-try:
-    import netifaces
-    NETIFACES_AVAILABLE = True
-except ImportError:
-    NETIFACES_AVAILABLE = False
+# Optional dependencies (qrcode, netifaces), imported on first use;
+# None records a module that is not installed
+_optional_modules: dict = {}
+
+
+def _optional_module(name: str):
+    """Import an optional dependency once, returning None if it is missing"""
+    if name not in _optional_modules:
+        try:
+            _optional_modules[name] = importlib.import_module(name)
+        except ImportError:
+            _optional_modules[name] = None
+    return _optional_modules[name]
+
+
+# Interfaces tried first (physical) and last (virtual bridges, loopback)
+PREFERRED_IFACE_PREFIXES = ('eth', 'en', 'wl')
+VIRTUAL_IFACE_PREFIXES = ('docker', 'br-', 'veth', 'lo', 'vbox', 'virbr')
+
+# Addresses never offered to the phone (loopback, link-local)
+SKIP_ADDR_PREFIXES = ('127.', '169.254.')
+
+
+# ioctl request returning an interface's IPv4 address
+SIOCGIFADDR = 0x8915
+
+
+def _default_route_ip() -> Optional[str]:
+    """Address of the interface holding the IPv4 default route, from /proc/net/route"""
+    try:
+        with open('/proc/net/route') as routes:
+            next(routes)  # Header
+            for line in routes:
+                fields = line.split()
+                # Destination 0.0.0.0 with RTF_UP set
+                if len(fields) > 3 and fields[1] == '00000000' and int(fields[3], 16) & 1:
+                    iface = fields[0]
+                    break
+            else:
+                return None
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            ifreq = fcntl.ioctl(s.fileno(), SIOCGIFADDR, struct.pack('256s', iface[:15].encode()))
+        return socket.inet_ntoa(ifreq[20:24])
+    except (OSError, ValueError, StopIteration):
+        return None
+
+
+def _iface_rank(name: str) -> int:
+    """Sort key putting physical interfaces first and virtual ones last"""
+    if name.startswith(PREFERRED_IFACE_PREFIXES):
+        return 0
+    if name.startswith(VIRTUAL_IFACE_PREFIXES):
+        return 2
+    return 1
 
 
 class QRDisplay(Gtk.Box):
     """Widget that displays a QR code for mobile connection"""
     
+    # Rendered QR textures kept for reuse, oldest dropped first
+    QR_CACHE_SIZE = 8
+    
+    # Target edge length of the rendered code (pixels)
+    QR_SIZE = 200
+    
+    # How long a detected local address is reused (seconds)
+    IP_CACHE_TTL = 5.0
+    
     def __init__(self, port: int = 5555):
         super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=12)
         
         self.port = port
+        
+        # (ip, port, scale factor) -> Gdk.Texture of its QR code
+        self._qr_cache: OrderedDict = OrderedDict()
+        
+        # (monotonic time, address) of the last local IP lookup
+        self._ip_cache = (0.0, None)
+        
+        # Incremented per regenerate(); older background results are not shown
+        self._gen_id = 0
+        
+        # Encoder reused across generations (created on first use); the
+        # lock keeps overlapping worker threads from sharing it mid-encode
+        self._qr = None
+        self._qr_lock = threading.Lock()
+        
+        # Payload length -> (version, mask pattern) chosen for the first payload
+        # of that length; equal-length addresses reuse it instead of searching
+        # again (guarded by _qr_lock, like the encoder)
+        self._qr_layouts: dict = {}
         self._setup_ui()
         
     def _setup_ui(self):
@@ -66,82 +144,166 @@ class QRDisplay(Gtk.Box):
         self.regenerate()
         
     def get_local_ip(self) -> str:
-        """Get the local IP address"""
-        if NETIFACES_AVAILABLE:
+        """Get the local IP address, reusing a recent lookup"""
+        now = time.monotonic()
+        ts, ip = self._ip_cache
+        if ip and now - ts < self.IP_CACHE_TTL:
+            return ip
+        ip = self._lookup_local_ip()
+        self._ip_cache = (now, ip)
+        return ip
+        
+    def invalidate_ip_cache(self):
+        """Forget the cached address, e.g. after a network change"""
+        self._ip_cache = (0.0, None)
+        
+    def _lookup_local_ip(self) -> str:
+        """Detect the local IP address"""
+        netifaces = _optional_module('netifaces')
+        if netifaces:
             try:
-                # Try to find a non-loopback interface
-                for iface in netifaces.interfaces():
-                    addrs = netifaces.ifaddresses(iface)
-                    if netifaces.AF_INET in addrs:
-                        for addr in addrs[netifaces.AF_INET]:
-                            ip = addr.get('addr', '')
-                            if ip and not ip.startswith('127.'):
-                                return ip
-            except:
+                # First usable address, stopping at the first interface that has one
+                ip = next((
+                    addr['addr']
+                    for iface in sorted(netifaces.interfaces(), key=_iface_rank)
+                    for addr in netifaces.ifaddresses(iface).get(netifaces.AF_INET, [])
+                    if addr.get('addr') and not addr['addr'].startswith(SKIP_ADDR_PREFIXES)
+                ), None)
+                if ip:
+                    return ip
+            except Exception:
                 pass
                 
+        # Interface of the default route, read from the kernel routing table
+        ip = _default_route_ip()
+        if ip:
+            return ip
+            
         # Fallback method
         try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(("8.8.8.8", 80))
-            ip = s.getsockname()[0]
-            s.close()
-            return ip
-        except:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                s.settimeout(0.2)
+                s.connect(("8.8.8.8", 80))
+                return s.getsockname()[0]
+        except OSError:
             return "127.0.0.1"
             
     def regenerate(self):
         """Regenerate the QR code with current network info"""
+        self._gen_id += 1
         ip = self.get_local_ip()
         self.ip_label.set_text(f"{ip}:{self.port}")
         
-        if not QR_AVAILABLE:
-            self._show_placeholder(ip)
+        # Same address as before: reuse the rendered code
+        key = (ip, self.port, self.get_scale_factor())
+        texture = self._qr_cache.get(key)
+        if texture is not None:
+            self.qr_image.set_paintable(texture)
             return
             
-        # Connection data
+        # Encode and rasterize in the background; the texture is set on the main loop
+        threading.Thread(
+            target=self._build_qr,
+            args=(self._gen_id, key),
+            daemon=True,
+            name="QRGenerate"
+        ).start()
+        
+    def _build_qr(self, gen_id: int, key: tuple):
+        """Encode the connection data and rasterize it (worker thread)"""
+        ip, port, scale_factor = key
+        
+        # Imported here, off the main loop, the first time a code is needed
+        qrcode = _optional_module('qrcode')
+        if qrcode is None:
+            log.warning("qrcode not available")
+            GLib.idle_add(self._apply_failure, gen_id, ip)
+            return
+            
+        # Connection data (compact, so the code needs fewer modules)
         data = json.dumps({
             "ip": ip,
-            "port": self.port,
+            "port": port,
             "protocol": "udp",
             "app": "pulselink"
-        })
+        }, separators=(',', ':'))
         
         try:
-            # Generate QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_M,
-                box_size=10,
-                border=2
-            )
+            matrix = self._encode(qrcode, data)
+            pixels, width, height = self._rasterize(matrix, scale_factor)
+        except Exception as e:
+            log.warning("QR generation error: %s", e)
+            GLib.idle_add(self._apply_failure, gen_id, ip)
+            return
+        GLib.idle_add(self._apply_qr, gen_id, key, pixels, width, height)
+        
+    def _encode(self, qrcode, data: str) -> list:
+        """Encode data into a module grid, reusing the version and mask found for its length"""
+        with self._qr_lock:
+            qr = self._qr
+            if qr is None:
+                qr = self._qr = qrcode.QRCode(
+                    version=1,
+                    error_correction=qrcode.constants.ERROR_CORRECT_L,
+                    box_size=10,
+                    border=2
+                )
+                
+            layout = self._qr_layouts.get(len(data))
+            if layout:
+                qr.clear()
+                qr.version, qr.mask_pattern = layout
+                qr.add_data(data)
+                try:
+                    qr.make(fit=False)
+                    return qr.get_matrix()
+                except qrcode.exceptions.DataOverflowError:
+                    pass  # Segments of this payload need more room; search again
+                    
+            qr.clear()
             qr.add_data(data)
-            qr.make(fit=True)
-            
-            # Create PIL image
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            # Convert to GdkPixbuf
-            buffer = io.BytesIO()
-            img.save(buffer, format='PNG')
-            buffer.seek(0)
-            
-            loader = GdkPixbuf.PixbufLoader.new_with_type('png')
-            loader.write(buffer.read())
-            loader.close()
-            pixbuf = loader.get_pixbuf()
-            
-            # Scale to fit
-            scaled = pixbuf.scale_simple(200, 200, GdkPixbuf.InterpType.NEAREST)
+            qr.best_fit()
+            qr.mask_pattern = qr.best_mask_pattern()
+            qr.make(fit=False)
+            self._qr_layouts[len(data)] = (qr.version, qr.mask_pattern)
+            return qr.get_matrix()
+        
+    def _apply_qr(self, gen_id: int, key: tuple, pixels: bytes, width: int, height: int) -> bool:
+        """Wrap rasterized pixels in a texture, cache it and show it if still current"""
+        texture = Gdk.MemoryTexture.new(
+            width,
+            height,
+            Gdk.MemoryFormat.R8G8B8,
+            GLib.Bytes.new(pixels),
+            width * 3
+        )
+        self._qr_cache[key] = texture
+        if len(self._qr_cache) > self.QR_CACHE_SIZE:
+            self._qr_cache.popitem(last=False)
             
-            # Set image
-            texture = Gdk.Texture.new_for_pixbuf(scaled)
+        if gen_id == self._gen_id:
             self.qr_image.set_paintable(texture)
-            
-        except Exception as e:
-            print(f"QR generation error: {e}")
+        return False
+        
+    def _apply_failure(self, gen_id: int, ip: str) -> bool:
+        """Show the placeholder for a failed generation, if still current"""
+        if gen_id == self._gen_id:
             self._show_placeholder(ip)
-            
+        return False
+        
+    def _rasterize(self, matrix, scale_factor: int = 1) -> tuple:
+        """Expand the module grid into (RGB bytes, width, height) at device pixel size"""
+        modules = np.asarray(matrix, dtype=bool)
+        scale = max(1, self.QR_SIZE * scale_factor // len(modules))
+        
+        # Dark modules black, light ones white, each scale x scale pixels
+        gray = np.where(modules, 0, 255).astype(np.uint8)
+        gray = gray.repeat(scale, axis=0).repeat(scale, axis=1)
+        rgb = np.ascontiguousarray(np.repeat(gray[:, :, None], 3, axis=2))
+        
+        height, width = gray.shape
+        return rgb.tobytes(), width, height
+        
     def _show_placeholder(self, ip: str):
         """Show placeholder when QR generation fails"""
         # Create a simple placeholder
@@ -153,7 +315,3 @@ class QRDisplay(Gtk.Box):
         """Update the port and regenerate QR"""
         self.port = port
         self.regenerate()
-
-
-# Import Gdk for texture creation
-from gi.repository import Gdk